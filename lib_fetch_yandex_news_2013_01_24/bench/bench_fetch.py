@@ -0,0 +1,284 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import threading, time, argparse
+from .. import fetch_news, services, retry
+from . import news_server as news_server_mod
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+DEFAULT_CONC_LIST = (1, 10, 50, 200)
+DEFAULT_PAGE_COUNT = 500
+
+BENCH_YANDEX_SERVICE = services.Service(
+        'bench-yandex',
+        ('127.0.0.1', 'localhost'),
+        fetch_news.parse_yandex_news_content,
+        fetch_news.FetchYandexNewsError,
+        url_pattern='^http\:\/\/[^\/]+\/yandex\/',
+        fix_url=fetch_news.fix_yandex_news_url,
+        )
+
+BENCH_GOOGLE_SERVICE = services.Service(
+        'bench-google',
+        ('127.0.0.1', 'localhost'),
+        fetch_news.parse_google_news_content,
+        fetch_news.FetchGoogleNewsError,
+        url_pattern='^http\:\/\/[^\/]+\/google\/',
+        fix_url=fetch_news.fix_google_news_url,
+        )
+
+def register_bench_services():
+    for service in (BENCH_YANDEX_SERVICE, BENCH_GOOGLE_SERVICE):
+        if services.registry.get(service.name) is None:
+            services.register_service(service)
+
+# peak resident set size of the process in bytes, or ``None``
+def get_peak_rss():
+    if resource is None:
+        return None
+    
+    # ``ru_maxrss`` is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def percentile(sorted_list, part):
+    if not sorted_list:
+        return None
+    
+    return sorted_list[min(len(sorted_list) - 1, int(len(sorted_list) * part))]
+
+class BenchResult:
+    pass
+
+def run_bench(url_list, conc, engine=None, max_attempts=None, **kwargs):
+    lock = threading.Lock()
+    done_event = threading.Event()
+    begin_map = {}
+    latency_list = []
+    counter = {'pages': 0, 'items': 0, 'errors': 0}
+    
+    def on_begin(data):
+        with lock:
+            begin_map[data.url_id] = time.monotonic()
+    
+    def on_result(data):
+        end_time = time.monotonic()
+        
+        with lock:
+            latency_list.append(end_time - begin_map.pop(data.url_id))
+            
+            if data.error is not None:
+                counter['errors'] += 1
+                return
+            
+            counter['pages'] += 1
+            counter['items'] += len(data.result)
+    
+    begin_time = time.monotonic()
+    fetch_news.fetch_news(
+            conc=conc,
+            url_list=url_list,
+            engine=engine,
+            retry_policy=retry.RetryPolicy(max_attempts=max_attempts),
+            on_begin=on_begin,
+            on_result=on_result,
+            on_done=done_event.set,
+            **kwargs
+            )
+    done_event.wait()
+    elapsed = time.monotonic() - begin_time
+    
+    latency_list.sort()
+    
+    bench_result = BenchResult()
+    bench_result.conc = conc
+    bench_result.elapsed = elapsed
+    bench_result.pages = counter['pages']
+    bench_result.items = counter['items']
+    bench_result.errors = counter['errors']
+    bench_result.pages_per_sec = counter['pages'] / elapsed
+    bench_result.items_per_sec = counter['items'] / elapsed
+    bench_result.p50 = percentile(latency_list, 0.5)
+    bench_result.p99 = percentile(latency_list, 0.99)
+    bench_result.peak_rss = get_peak_rss()
+    
+    return bench_result
+
+def format_bench_result(bench_result):
+    if bench_result.peak_rss is not None:
+        peak_rss = '{:.1f} MiB'.format(bench_result.peak_rss / 1024 / 1024)
+    else:
+        peak_rss = 'n/a'
+    
+    return (
+            'conc {:>4}: {:>8.1f} pages/s {:>9.1f} items/s '
+            'p50 {:>7.1f} ms p99 {:>7.1f} ms '
+            'errors {:>4} peak rss {}'.format(
+                    bench_result.conc,
+                    bench_result.pages_per_sec,
+                    bench_result.items_per_sec,
+                    (bench_result.p50 or 0.0) * 1000,
+                    (bench_result.p99 or 0.0) * 1000,
+                    bench_result.errors,
+                    peak_rss,
+                    )
+            )
+
+def parse_conc_list(value):
+    try:
+        conc_list = tuple(int(conc) for conc in value.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+                'invalid concurrency list: {!r}'.format(value))
+    
+    if not conc_list or min(conc_list) < 1:
+        raise argparse.ArgumentTypeError(
+                'invalid concurrency list: {!r}'.format(value))
+    
+    return conc_list
+
+def main():
+    parser = argparse.ArgumentParser(
+            description='benchmark of fetching news from local news server. '
+                    'peak rss is of the whole process, so it never decreases '
+                    'between runs',
+            )
+    parser.add_argument(
+            '--conc',
+            metavar='CONCURRENCY[,CONCURRENCY...]',
+            type=parse_conc_list,
+            help='concurrency values to try. default is {}'.format(
+                    ','.join(str(conc) for conc in DEFAULT_CONC_LIST)),
+            )
+    parser.add_argument(
+            '--pages',
+            metavar='PAGE-COUNT',
+            type=int,
+            help='number of pages to fetch on every run. '
+                    'default is {}'.format(DEFAULT_PAGE_COUNT),
+            )
+    parser.add_argument(
+            '--engine',
+            choices=fetch_news.ENGINE_LIST,
+            help='fetch engine',
+            )
+    parser.add_argument(
+            '--kind',
+            choices=news_server_mod.KIND_LIST,
+            help='kind of news pages. default is ``{}``'.format(
+                    news_server_mod.KIND_YANDEX),
+            )
+    parser.add_argument(
+            '--page-dir',
+            metavar='PAGE-DIR-PATH',
+            help='serve recorded pages from directory '
+                    'instead of synthetic ones',
+            )
+    parser.add_argument(
+            '--items',
+            metavar='ITEM-COUNT',
+            type=int,
+            help='number of news items on synthetic page',
+            )
+    parser.add_argument(
+            '--text-size',
+            metavar='CHARS',
+            type=int,
+            help='size of news item text on synthetic page',
+            )
+    parser.add_argument(
+            '--latency',
+            metavar='SECONDS',
+            type=float,
+            help='server response delay',
+            )
+    parser.add_argument(
+            '--latency-jitter',
+            metavar='SECONDS',
+            type=float,
+            help='random variation of server response delay',
+            )
+    parser.add_argument(
+            '--error-rate',
+            metavar='PART',
+            type=float,
+            help='part of 503 responses, like ``0.05``',
+            )
+    parser.add_argument(
+            '--redirect-rate',
+            metavar='PART',
+            type=float,
+            help='part of redirect (captcha) responses',
+            )
+    parser.add_argument(
+            '--max-attempts',
+            metavar='ATTEMPTS',
+            type=int,
+            help='max attempts for failed pages. default is 1 (no retries)',
+            )
+    parser.add_argument(
+            '--parse-procs',
+            metavar='PROCESS-COUNT',
+            type=int,
+            help='parse pages in separate processes',
+            )
+    args = parser.parse_args()
+    
+    conc_list = args.conc or DEFAULT_CONC_LIST
+    page_count = args.pages or DEFAULT_PAGE_COUNT
+    kind = args.kind or news_server_mod.KIND_YANDEX
+    max_attempts = args.max_attempts or 1
+    
+    register_bench_services()
+    
+    news_server = news_server_mod.NewsServer(
+            item_count=args.items,
+            text_size=args.text_size,
+            page_dir=args.page_dir,
+            latency=args.latency,
+            latency_jitter=args.latency_jitter,
+            error_rate=args.error_rate,
+            redirect_rate=args.redirect_rate,
+            seed=0,
+            )
+    news_server.start()
+    
+    try:
+        url_list = tuple(
+                news_server.url(kind, '{}.html'.format(page_i))
+                for page_i in range(page_count)
+                )
+        
+        for conc in conc_list:
+            bench_result = run_bench(
+                    url_list,
+                    conc,
+                    engine=args.engine,
+                    max_attempts=max_attempts,
+                    parse_procs=args.parse_procs,
+                    )
+            print(format_bench_result(bench_result))
+    finally:
+        news_server.close()
+
+if __name__ == '__main__':
+    main()
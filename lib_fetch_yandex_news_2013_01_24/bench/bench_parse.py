@@ -0,0 +1,264 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import os, os.path, time, tracemalloc, argparse
+from urllib import parse as url_parse
+from .. import fetch_news
+from . import news_server
+
+try:
+    from ..lib_html_parse import html_parse
+except ImportError:
+    html_parse = None
+
+DEFAULT_ITEM_COUNT_LIST = (10, 100, 1000)
+DEFAULT_REPEAT = 5
+
+PAGE_URL = 'http://news.yandex.ru/bench.html'
+
+# tree parsers below are the ``html_parse`` based parsing which was used
+#   before ``news_extract``. they are kept here to compare with it
+
+def get_first_data(node_list):
+    if not node_list or not node_list[0].childs or \
+            not isinstance(node_list[0].childs[0], html_parse.DataHtmlNode):
+        return None
+    
+    return node_list[0].childs[0].data
+
+def tree_find_yandex_news(url, root):
+    result_list = []
+    
+    for news_item_node in html_parse.find_tags(
+            (root,), 'dl', in_attrs={'class': 'b-news-item'}):
+        news_title_nodes = tuple(html_parse.find_tags(
+                (news_item_node,), 'a', in_attrs={'class': 'title'}))
+        news_text_nodes = tuple(html_parse.find_tags(
+                (news_item_node,), 'dd', in_attrs={'class': 'text'}))
+        
+        title = get_first_data(news_title_nodes)
+        
+        if title is None:
+            continue
+        
+        result_item = {}
+        result_item['title'] = title
+        result_item['raw_url'] = url_parse.urljoin(
+                url, news_title_nodes[0].attrs.get('href', ''))
+        result_item['url'] = fetch_news.fix_yandex_news_url(
+                result_item['raw_url'])
+        
+        text = get_first_data(news_text_nodes)
+        
+        if text is not None:
+            result_item['text'] = text
+        
+        result_list.append(result_item)
+    
+    return tuple(result_list)
+
+def tree_find_google_news(url, root):
+    result_list = []
+    
+    for news_item_node in html_parse.find_tags(
+            (root,), 'a', in_attrs={'class': 'article'}):
+        news_title_nodes = tuple(html_parse.find_tags(
+                (news_item_node,), 'span', in_attrs={'class': 'titletext'}))
+        
+        title = get_first_data(news_title_nodes)
+        
+        if title is None:
+            continue
+        
+        result_item = {}
+        result_item['raw_url'] = url_parse.urljoin(
+                url, news_item_node.attrs.get('href', ''))
+        result_item['url'] = fetch_news.fix_google_news_url(
+                result_item['raw_url'])
+        result_item['title'] = title
+        
+        result_list.append(result_item)
+    
+    return tuple(result_list)
+
+def get_parser_list(kind):
+    if kind == news_server.KIND_GOOGLE:
+        extract = fetch_news.parse_google_news_content
+        tree_find = tree_find_google_news
+    else:
+        extract = fetch_news.parse_yandex_news_content
+        tree_find = tree_find_yandex_news
+    
+    # every parser is ``(name, prepare, parse)``: ``prepare(content)``
+    #   is not measured, ``parse(prepared)`` is measured
+    parser_list = [
+            (
+                'news_extract',
+                lambda content: content,
+                lambda content: extract(PAGE_URL, content),
+            ),
+            ]
+    
+    if html_parse is not None:
+        parser_list += [
+                (
+                    'html_parse',
+                    lambda content: content.decode('utf-8', 'replace'),
+                    lambda content: html_parse.html_parse(
+                            content, use_min_attr_hack=True),
+                ),
+                (
+                    'find_tags',
+                    lambda content: html_parse.html_parse(
+                            content.decode('utf-8', 'replace'),
+                            use_min_attr_hack=True),
+                    lambda root: tree_find(PAGE_URL, root),
+                ),
+                (
+                    'html_parse+find_tags',
+                    lambda content: content,
+                    lambda content: tree_find(PAGE_URL, html_parse.html_parse(
+                            content.decode('utf-8', 'replace'),
+                            use_min_attr_hack=True)),
+                ),
+                ]
+    
+    return tuple(parser_list)
+
+def load_corpus(corpus_dir=None, kind=None, item_count_list=None):
+    if corpus_dir is not None:
+        corpus = []
+        
+        for name in sorted(os.listdir(corpus_dir)):
+            path = os.path.join(corpus_dir, name)
+            
+            if not os.path.isfile(path):
+                continue
+            
+            with open(path, 'rb') as fd:
+                corpus.append((name, fd.read()))
+        
+        return tuple(corpus)
+    
+    if item_count_list is None:
+        item_count_list = DEFAULT_ITEM_COUNT_LIST
+    
+    if kind == news_server.KIND_GOOGLE:
+        make_page = news_server.make_google_page
+    else:
+        make_page = news_server.make_yandex_page
+    
+    return tuple(
+            (
+                '{}-items'.format(item_count),
+                make_page(item_count, news_server.DEFAULT_TEXT_SIZE),
+            )
+            for item_count in item_count_list
+            )
+
+# returns best time of ``repeat`` runs, and memory allocated by one run:
+#   peak size and size which is still kept after it
+def measure(prepare, parse, content, repeat):
+    prepared = prepare(content)
+    best_time = None
+    
+    for repeat_i in range(repeat):
+        begin_time = time.perf_counter()
+        parse(prepared)
+        run_time = time.perf_counter() - begin_time
+        
+        if best_time is None or run_time < best_time:
+            best_time = run_time
+    
+    tracemalloc.start()
+    
+    try:
+        result = parse(prepared)
+        kept_size, peak_size = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    
+    del result
+    
+    return best_time, peak_size, kept_size
+
+def main():
+    parser = argparse.ArgumentParser(
+            description='benchmark of parsing news pages. '
+                    'no network is used',
+            )
+    parser.add_argument(
+            '--corpus-dir',
+            metavar='CORPUS-DIR-PATH',
+            help='directory of saved news pages. '
+                    'by default synthetic pages are used',
+            )
+    parser.add_argument(
+            '--kind',
+            choices=news_server.KIND_LIST,
+            help='kind of news pages. default is ``{}``'.format(
+                    news_server.KIND_YANDEX),
+            )
+    parser.add_argument(
+            '--items',
+            metavar='ITEM-COUNT[,ITEM-COUNT...]',
+            help='sizes of synthetic pages. default is {}'.format(
+                    ','.join(str(item_count)
+                            for item_count in DEFAULT_ITEM_COUNT_LIST)),
+            )
+    parser.add_argument(
+            '--repeat',
+            metavar='COUNT',
+            type=int,
+            help='runs per page, the best one is shown. '
+                    'default is {}'.format(DEFAULT_REPEAT),
+            )
+    args = parser.parse_args()
+    
+    kind = args.kind or news_server.KIND_YANDEX
+    repeat = args.repeat or DEFAULT_REPEAT
+    
+    if args.items is not None:
+        item_count_list = tuple(int(item) for item in args.items.split(','))
+    else:
+        item_count_list = None
+    
+    if html_parse is None:
+        print('html_parse is not available, only news_extract is measured')
+    
+    corpus = load_corpus(
+            corpus_dir=args.corpus_dir,
+            kind=kind,
+            item_count_list=item_count_list,
+            )
+    parser_list = get_parser_list(kind)
+    
+    for page_name, content in corpus:
+        print('{} ({} bytes):'.format(page_name, len(content)))
+        
+        for parser_name, prepare, parse in parser_list:
+            best_time, peak_size, kept_size = measure(
+                    prepare, parse, content, repeat)
+            print('    {:<22} {:>9.3f} ms  peak {:>10} bytes  '
+                    'kept {:>10} bytes'.format(
+                            parser_name, best_time * 1000,
+                            peak_size, kept_size))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import time, tracemalloc, argparse, json, hashlib
+from .. import fetch_news, news_item, output_writers, dedup
+
+DEFAULT_ITEM_COUNT = 200000
+DEFAULT_ITEMS_PER_URL = 20
+
+# records as they were before ``news_item.NewsItem`` and slotted
+#   ``fetch_news.Data``
+
+class DictData:
+    pass
+
+def make_fields(item_i):
+    return (
+            'News {}'.format(item_i),
+            'http://news.yandex.ru/yandsearch?cl4url={}'.format(item_i),
+            'http://example.com/news/{}'.format(item_i),
+            'Text {}'.format(item_i),
+            )
+
+def make_dict_item(fields):
+    title, raw_url, url, text = fields
+    
+    return {'title': title, 'raw_url': raw_url, 'url': url, 'text': text}
+
+def make_news_item(fields):
+    title, raw_url, url, text = fields
+    
+    return news_item.NewsItem(
+            title=title, raw_url=raw_url, url=url, text=text)
+
+def make_data_list(data_class, make_item, fields_list, items_per_url):
+    data_list = []
+    
+    for url_id, pos in enumerate(range(0, len(fields_list), items_per_url)):
+        data = data_class()
+        data.url_id = url_id
+        data.url = fields_list[pos][2]
+        data.attempt = 1
+        data.error = None
+        data.error_kind = None
+        data.wire_size = 0
+        data.transfer_time = 0.0
+        data.cached = False
+        data.timings = None
+        data.result = tuple(map(
+                make_item, fields_list[pos:pos + items_per_url]))
+        data_list.append(data)
+    
+    return data_list
+
+# returns bytes kept by records. strings are made before, so they are
+#   not counted
+def measure_memory(data_class, make_item, fields_list, items_per_url):
+    tracemalloc.start()
+    
+    try:
+        data_list = make_data_list(
+                data_class, make_item, fields_list, items_per_url)
+        records_size = tracemalloc.get_traced_memory()[0]
+        del data_list
+        
+        return records_size
+    finally:
+        tracemalloc.stop()
+
+# consumers as they were before ``news_item.NewsItem``: ``dict``
+#   items are read by ``.get()``
+
+def old_result_line_format(data):
+    for result in data.result:
+        result_title = result.get('title')
+        result_url = result.get('url')
+        
+        if result_title is None or result_url is None:
+            continue
+        
+        yield '{} {}'.format(
+                str(result_title).replace('\n', ' ... '),
+                str(result_url).replace('\n', ' ... '),
+                )
+
+def old_iter_records(data):
+    for result in data.result:
+        yield {
+                'url_id': data.url_id,
+                'source_url': data.url,
+                'title': result.get('title'),
+                'url': result.get('url'),
+                'raw_url': result.get('raw_url'),
+                'text': result.get('text'),
+                }
+
+def old_get_item_key(item, use_title=None):
+    key_str = item.get('url') or item.get('raw_url') or ''
+    
+    if use_title:
+        key_str = '{}\n{}'.format(key_str,
+                dedup.get_title_fingerprint(item.get('title') or ''))
+    
+    return hashlib.blake2b(
+            key_str.encode('utf-8', 'replace'),
+            digest_size=dedup.KEY_DIGEST_SIZE,
+            ).digest()
+
+# the real path of results: text lines, JSON lines and dedup keys
+
+def old_format_text(data_list):
+    for data in data_list:
+        for line in old_result_line_format(data):
+            pass
+
+def new_format_text(data_list):
+    for data in data_list:
+        for line in fetch_news.result_line_format(data, show_url=True):
+            pass
+
+def old_format_jsonl(data_list):
+    for data in data_list:
+        ''.join(
+                '{}\n'.format(json.dumps(record, ensure_ascii=False))
+                for record in old_iter_records(data))
+
+def new_format_jsonl(data_list):
+    formatter = output_writers.JsonlFormatter()
+    
+    for data in data_list:
+        formatter.format(data)
+
+
+def old_dedup_keys(data_list):
+    for data in data_list:
+        for result in data.result:
+            old_get_item_key(result)
+
+def new_dedup_keys(data_list):
+    for data in data_list:
+        for result in data.result:
+            dedup.get_item_key(result)
+
+def measure_time(func, data_list, repeat=5):
+    best_time = None
+    
+    for repeat_i in range(repeat):
+        begin_time = time.perf_counter()
+        func(data_list)
+        run_time = time.perf_counter() - begin_time
+        
+        if best_time is None or run_time < best_time:
+            best_time = run_time
+    
+    return best_time
+
+def main():
+    parser = argparse.ArgumentParser(
+            description='benchmark of memory of news records and time '
+                    'of their formatting (text, JSON lines) and dedup keys: '
+                    '``dict`` items and ``Data`` with ``__dict__`` '
+                    'against ``NewsItem`` and slotted ``Data``',
+            )
+    parser.add_argument(
+            '--items',
+            metavar='ITEM-COUNT',
+            type=int,
+            help='number of news items. default is {}'.format(
+                    DEFAULT_ITEM_COUNT),
+            )
+    parser.add_argument(
+            '--items-per-url',
+            metavar='ITEM-COUNT',
+            type=int,
+            help='number of news items of every url. default is {}'.format(
+                    DEFAULT_ITEMS_PER_URL),
+            )
+    args = parser.parse_args()
+    
+    item_count = args.items or DEFAULT_ITEM_COUNT
+    items_per_url = args.items_per_url or DEFAULT_ITEMS_PER_URL
+    
+    fields_list = tuple(map(make_fields, range(item_count)))
+    
+    for name, data_class, make_item, func_list in (
+            ('dict', DictData, make_dict_item,
+                    (old_format_text, old_format_jsonl, old_dedup_keys)),
+            ('slots', fetch_news.Data, make_news_item,
+                    (new_format_text, new_format_jsonl, new_dedup_keys)),
+            ):
+        records_size = measure_memory(
+                data_class, make_item, fields_list, items_per_url)
+        data_list = make_data_list(
+                data_class, make_item, fields_list, items_per_url)
+        
+        print('{:<6} records {:>7.1f} MiB ({:>5.1f} bytes/item)'.format(
+                name,
+                records_size / 1024 / 1024,
+                records_size / item_count,
+                ))
+        
+        for func_name, func in zip(('text', 'jsonl', 'dedup'), func_list):
+            run_time = measure_time(func, data_list)
+            
+            print('    {:<6} {:>7.1f} ms ({:>5.1f} ns/item)'.format(
+                    func_name,
+                    run_time * 1000,
+                    run_time / item_count * 1e9,
+                    ))
+
+if __name__ == '__main__':
+    main()
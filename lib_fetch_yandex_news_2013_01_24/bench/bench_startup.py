@@ -0,0 +1,125 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import sys, subprocess, argparse
+
+DEFAULT_REPEAT = 5
+
+CLI_MODULE = 'lib_fetch_yandex_news_2013_01_24.main_cli'
+
+# modules which ``main_cli`` must not import before options are parsed.
+#   they are imported by functions when fetching starts or when an
+#   option needs them
+CLI_LAZY_MODULE_LIST = (
+        'asyncio',
+        'http.client',
+        'ssl',
+        'html.parser',
+        'concurrent.futures',
+        'sqlite3',
+        'cProfile',
+        'tkinter',
+        'multiprocessing',
+        'lib_fetch_yandex_news_2013_01_24.http_client',
+        'lib_fetch_yandex_news_2013_01_24.http_cache',
+        'lib_fetch_yandex_news_2013_01_24.news_extract',
+        'lib_fetch_yandex_news_2013_01_24.parse_stage',
+        'lib_fetch_yandex_news_2013_01_24.fetch_news_async',
+        'lib_fetch_yandex_news_2013_01_24.lib_html_parse',
+        )
+
+# runs ``python -X importtime -c 'import MODULE'``. returns map of
+#   imported modules to their cumulative import time in microseconds
+def get_import_times(module):
+    proc = subprocess.run(
+            (sys.executable, '-X', 'importtime', '-c',
+                    'import {}'.format(module)),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            check=True,
+            universal_newlines=True,
+            )
+    time_map = {}
+    
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        
+        if not cumulative_us.strip().isdigit():
+            # header line
+            continue
+        
+        time_map[name.strip()] = int(cumulative_us)
+    
+    return time_map
+
+def main():
+    parser = argparse.ArgumentParser(
+            description='benchmark of start time of ``fetch-yandex-news``. '
+                    'fails if heavy modules are imported on start or '
+                    'if start is slower than ``--max-ms``',
+            )
+    parser.add_argument(
+            '--repeat',
+            metavar='COUNT',
+            type=int,
+            help='runs, the best one is shown. default is {}'.format(
+                    DEFAULT_REPEAT),
+            )
+    parser.add_argument(
+            '--max-ms',
+            metavar='MILLISECONDS',
+            type=float,
+            help='max import time of ``main_cli``',
+            )
+    args = parser.parse_args()
+    
+    repeat = args.repeat or DEFAULT_REPEAT
+    best_us = None
+    
+    for repeat_i in range(repeat):
+        time_map = get_import_times(CLI_MODULE)
+        cli_us = time_map[CLI_MODULE]
+        
+        if best_us is None or cli_us < best_us:
+            best_us = cli_us
+    
+    print('import of {}: {:.1f} ms'.format(CLI_MODULE, best_us / 1000))
+    
+    failed = False
+    
+    for module in CLI_LAZY_MODULE_LIST:
+        if module in time_map:
+            print('FAIL: {} is imported on start ({:.1f} ms)'.format(
+                    module, time_map[module] / 1000))
+            failed = True
+    
+    if args.max_ms is not None and best_us / 1000 > args.max_ms:
+        print('FAIL: import is slower than {} ms'.format(args.max_ms))
+        failed = True
+    
+    if failed:
+        sys.exit(1)
+    
+    print('ok')
+
+if __name__ == '__main__':
+    main()
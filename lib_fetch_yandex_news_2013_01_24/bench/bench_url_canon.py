@@ -0,0 +1,124 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import time, random, argparse
+from urllib import parse as url_parse
+from .. import url_canon
+
+DEFAULT_URL_COUNT = 100000
+DEFAULT_UNIQUE_PART = 0.1
+
+BASE_URL = 'http://news.yandex.ru/politics.html'
+
+# url handling as it was before ``url_canon``
+
+def old_fix_yandex_news_url(raw_url):
+    raw_url_obj = url_parse.urlsplit(raw_url)
+    raw_url_query = raw_url_obj.query
+    
+    if not raw_url_query:
+        return str(raw_url)
+    
+    raw_url_params = url_parse.parse_qs(raw_url_query)
+    cl4url_param = raw_url_params.get('cl4url', [''])[0]
+    
+    if not cl4url_param:
+        return str(raw_url)
+    
+    if not url_parse.urlparse(cl4url_param).scheme:
+        cl4url_param = 'http://{}'.format(cl4url_param)
+    
+    return cl4url_param
+
+def old_handle_href(href):
+    return old_fix_yandex_news_url(url_parse.urljoin(BASE_URL, href))
+
+def new_handle_href(href):
+    return url_canon.fix_yandex_news_url(url_canon.join_url(BASE_URL, href))
+
+def make_href(href_i):
+    return '/yandsearch?cl4url={}&lr=213&lang=ru&rpt=story&stid={}'.format(
+            url_parse.quote('www.example{}.ru/news/{}.html'.format(
+                    href_i % 97, href_i), safe=''),
+            href_i)
+
+def measure(handle_href, href_list):
+    begin_time = time.perf_counter()
+    
+    for href in href_list:
+        handle_href(href)
+    
+    return time.perf_counter() - begin_time
+
+def main():
+    parser = argparse.ArgumentParser(
+            description='micro-benchmark of fixing Yandex.News urls: '
+                    '``url_canon`` against ``urljoin`` + ``parse_qs``',
+            )
+    parser.add_argument(
+            '--urls',
+            metavar='URL-COUNT',
+            type=int,
+            help='number of handled urls. default is {}'.format(
+                    DEFAULT_URL_COUNT),
+            )
+    parser.add_argument(
+            '--unique',
+            metavar='PART',
+            type=float,
+            help='part of unique urls (others are repeated, as the same '
+                    'news are shown in many categories). '
+                    'default is {}'.format(DEFAULT_UNIQUE_PART),
+            )
+    args = parser.parse_args()
+    
+    url_count = args.urls or DEFAULT_URL_COUNT
+    unique_part = args.unique or DEFAULT_UNIQUE_PART
+    
+    rnd = random.Random(0)
+    unique_count = max(1, int(url_count * unique_part))
+    href_list = tuple(
+            make_href(rnd.randrange(unique_count)) for href_i in range(url_count))
+    
+    unique_url_list = tuple(
+            url_parse.urljoin(BASE_URL, href)
+            for href in map(make_href, range(url_count)))
+    
+    for href in href_list[:1000]:
+        assert old_handle_href(href) == new_handle_href(href), href
+    
+    for title, old_func, new_func, arg_list in (
+            ('urljoin + fix, repeated urls',
+                    old_handle_href, new_handle_href, href_list),
+            ('fix, unique urls',
+                    old_fix_yandex_news_url, url_canon.fix_yandex_news_url,
+                    unique_url_list),
+            ):
+        print('{}:'.format(title))
+        
+        url_canon.fix_yandex_news_url.cache_clear()
+        url_canon.join_url.cache_clear()
+        
+        for name, func in (('old', old_func), ('url_canon', new_func)):
+            run_time = measure(func, arg_list)
+            print('    {:<10} {:>8.1f} ms ({:>6.0f} ns/url)'.format(
+                    name, run_time * 1000, run_time / url_count * 1e9))
+
+if __name__ == '__main__':
+    main()
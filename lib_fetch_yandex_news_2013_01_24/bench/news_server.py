@@ -0,0 +1,229 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import os, os.path, threading, time, random
+from http import server as http_server
+from urllib import parse as url_parse
+
+KIND_YANDEX = 'yandex'
+KIND_GOOGLE = 'google'
+KIND_LIST = (KIND_YANDEX, KIND_GOOGLE)
+
+DEFAULT_ITEM_COUNT = 20
+DEFAULT_TEXT_SIZE = 200
+
+def make_yandex_page(item_count, text_size, seed=0):
+    item_list = []
+    
+    for item_i in range(item_count):
+        item_list.append(
+                '<dl class="b-news-item">'
+                '<dt><a class="title" href="/yandsearch?'
+                'cl4url=example{0}.com%2Fnews%2F{1}">News {1} / {0}</a></dt>'
+                '<dd class="text">{2}</dd>'
+                '</dl>\n'.format(seed, item_i, 'x' * text_size)
+                )
+    
+    return (
+            '<!DOCTYPE html>\n<html><head><title>News</title></head>'
+            '<body>\n{}</body></html>\n'.format(''.join(item_list))
+            ).encode('utf-8')
+
+def make_google_page(item_count, text_size, seed=0):
+    item_list = []
+    
+    for item_i in range(item_count):
+        item_list.append(
+                '<div class="story">'
+                '<a class="article" href="http://example{0}.com/news/{1}">'
+                '<span class="titletext">News {1} / {0}</span></a>'
+                '<div class="snippet">{2}</div>'
+                '</div>\n'.format(seed, item_i, 'x' * text_size)
+                )
+    
+    return (
+            '<!DOCTYPE html>\n<html><head><title>News</title></head>'
+            '<body>\n{}</body></html>\n'.format(''.join(item_list))
+            ).encode('utf-8')
+
+def load_page_dir(page_dir):
+    page_list = []
+    
+    for name in sorted(os.listdir(page_dir)):
+        path = os.path.join(page_dir, name)
+        
+        if not os.path.isfile(path):
+            continue
+        
+        with open(path, 'rb') as fd:
+            page_list.append(fd.read())
+    
+    if not page_list:
+        raise ValueError('no pages in {!r}'.format(page_dir))
+    
+    return tuple(page_list)
+
+class NewsHttpServer(http_server.ThreadingHTTPServer):
+    # many clients connect at once, small backlog would drop them
+    request_queue_size = 1024
+    daemon_threads = True
+
+class NewsRequestHandler(http_server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # head and body are written separately
+    disable_nagle_algorithm = True
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _send(self, status, body, headers=()):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        
+        for name, value in headers:
+            self.send_header(name, value)
+        
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_GET(self):
+        news_server = self.server.news_server
+        kind, sep, page_name = self.path.lstrip('/').partition('/')
+        
+        if not sep or kind not in KIND_LIST:
+            self._send(404, b'not found')
+            return
+        
+        outcome, latency = news_server.next_outcome()
+        
+        if latency:
+            time.sleep(latency)
+        
+        if outcome == 'error':
+            self._send(503, b'service unavailable')
+        elif outcome == 'redirect':
+            self._send(302, b'', headers=(
+                    ('Location', '/showcaptcha?retpath={}'.format(
+                            url_parse.quote(self.path, safe=''))),
+                    ))
+        else:
+            self._send(200, news_server.get_page(kind, page_name))
+
+# local HTTP server of synthetic (or recorded) news pages.
+#   ``/yandex/NAME`` serves ``b-news-item`` page, ``/google/NAME`` serves
+#   ``a.article`` page. every response is delayed by ``latency`` seconds
+#   (+/- ``latency_jitter``), ``error_rate`` part of responses are 503,
+#   ``redirect_rate`` part of them are redirects to captcha
+class NewsServer:
+    def __init__(self, host=None, port=None,
+            item_count=None, text_size=None, page_dir=None,
+            latency=None, latency_jitter=None,
+            error_rate=None, redirect_rate=None, seed=None):
+        if host is None:
+            host = '127.0.0.1'
+        
+        if port is None:
+            port = 0
+        
+        if item_count is None:
+            item_count = DEFAULT_ITEM_COUNT
+        
+        if text_size is None:
+            text_size = DEFAULT_TEXT_SIZE
+        
+        self._item_count = item_count
+        self._text_size = text_size
+        self._latency = latency or 0.0
+        self._latency_jitter = latency_jitter or 0.0
+        self._error_rate = error_rate or 0.0
+        self._redirect_rate = redirect_rate or 0.0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._page_map = {}
+        
+        if page_dir is not None:
+            self._recorded_page_list = load_page_dir(page_dir)
+        else:
+            self._recorded_page_list = None
+        
+        self._httpd = NewsHttpServer((host, port), NewsRequestHandler)
+        self._httpd.news_server = self
+        self._thread = None
+    
+    @property
+    def host(self):
+        return self._httpd.server_address[0]
+    
+    @property
+    def port(self):
+        return self._httpd.server_address[1]
+    
+    def url(self, kind, page_name):
+        return 'http://{}:{}/{}/{}'.format(self.host, self.port, kind, page_name)
+    
+    def next_outcome(self):
+        with self._lock:
+            dice = self._random.random()
+            
+            if self._latency_jitter:
+                latency = self._latency + self._random.uniform(
+                        -self._latency_jitter, self._latency_jitter)
+            else:
+                latency = self._latency
+        
+        if dice < self._error_rate:
+            outcome = 'error'
+        elif dice < self._error_rate + self._redirect_rate:
+            outcome = 'redirect'
+        else:
+            outcome = 'ok'
+        
+        return outcome, max(0.0, latency)
+    
+    def get_page(self, kind, page_name):
+        if self._recorded_page_list is not None:
+            page_i = hash(page_name) % len(self._recorded_page_list)
+            
+            return self._recorded_page_list[page_i]
+        
+        with self._lock:
+            page = self._page_map.get(kind)
+            
+            if page is None:
+                if kind == KIND_GOOGLE:
+                    make_page = make_google_page
+                else:
+                    make_page = make_yandex_page
+                
+                page = make_page(self._item_count, self._text_size)
+                self._page_map[kind] = page
+        
+        return page
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever)
+        self._thread.start()
+    
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        
+        if self._thread is not None:
+            self._thread.join()
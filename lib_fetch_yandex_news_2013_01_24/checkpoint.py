@@ -0,0 +1,109 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import os
+
+# journal of urls whose results are in output file. every line is
+#   ``OFFSET URL-ID URL-ID ... [/ KEY KEY ...]`` -- output file size
+#   after the results of the urls were flushed, and (with
+#   ``attach_dedup()``) hex keys of written news. lines are appended
+#   once per output flush, so the journal never points after data which
+#   is not on disk. torn last line (of killed run) is ignored
+class CheckpointJournal:
+    def __init__(self, path, resume=None, fsync=None):
+        if resume is None:
+            resume = False
+        
+        if fsync is None:
+            fsync = False
+        
+        self._fsync = fsync
+        self._dedup = None
+        self._dedup_keys = []
+        self.done_url_ids = set()
+        self.offset = 0
+        
+        if resume:
+            self._load(path)
+            self._fd = open(path, 'a', encoding='utf-8', newline='\n')
+            
+            # finishes torn line, so next line is not glued to it
+            self._fd.write('\n')
+        else:
+            self._fd = open(path, 'w', encoding='utf-8', newline='\n')
+    
+    def _load(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8', newline='\n') as fd:
+                content = fd.read()
+        except FileNotFoundError:
+            return
+        
+        for line in content.split('\n')[:-1]:
+            id_part, sep, key_part = line.partition('/')
+            
+            try:
+                value_list = tuple(map(int, id_part.split()))
+                key_list = tuple(map(bytes.fromhex, key_part.split()))
+            except ValueError:
+                continue
+            
+            if not value_list:
+                continue
+            
+            self.offset = value_list[0]
+            self.done_url_ids.update(value_list[1:])
+            self._dedup_keys.extend(key_list)
+    
+    # fills ``dedup_index`` with keys of news which are in output file
+    #   already, and records keys of news written from now on. without
+    #   it resumed run would write again news dropped as duplicates
+    def attach_dedup(self, dedup_index):
+        dedup_index.add_keys(self._dedup_keys)
+        self._dedup_keys = []
+        self._dedup = dedup_index
+    
+    # called by ``output_writers.OutputWriter`` after output file is
+    #   flushed
+    def record(self, offset, data_list):
+        part_list = [str(offset)]
+        part_list.extend(str(data.url_id) for data in data_list)
+        
+        if self._dedup is not None:
+            part_list.append('/')
+            part_list.extend(
+                    self._dedup.get_key(item).hex()
+                    for data in data_list
+                    for item in data.result)
+        
+        self._fd.write('{}\n'.format(' '.join(part_list)))
+        self._fd.flush()
+        
+        if self._fsync:
+            os.fsync(self._fd.fileno())
+    
+    def close(self):
+        self._fd.close()
+
+# cuts results of urls which are not in journal off output file
+def truncate_output(path, offset):
+    try:
+        os.truncate(path, offset)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,97 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import threading, time
+
+DEFAULT_IDLE_TIMEOUT = 30.0 # seconds
+
+# keeps idle keep-alive connections per host key. any kind of connection
+#   object is allowed -- ``close_conn`` knows how to close it. expired
+#   connections are closed by next ``get()``. the pool lives for one
+#   fetch run, so nothing is kept between ``--watch`` passes
+class ConnPool:
+    def __init__(self, close_conn, max_size=None, idle_timeout=None):
+        if idle_timeout is None:
+            idle_timeout = DEFAULT_IDLE_TIMEOUT
+        
+        self._close_conn = close_conn
+        self._max_size = max_size
+        self._idle_timeout = idle_timeout
+        self._lock = threading.RLock()
+        self._idle_map = {}
+        self._closed = False
+    
+    def _pop_expired(self, now):
+        expired_list = []
+        
+        for key, idle_list in tuple(self._idle_map.items()):
+            while idle_list and now - idle_list[0][1] > self._idle_timeout:
+                expired_list.append(idle_list.pop(0)[0])
+            
+            if not idle_list:
+                del self._idle_map[key]
+        
+        return expired_list
+    
+    def _close_list(self, conn_list):
+        for conn in conn_list:
+            try:
+                self._close_conn(conn)
+            except Exception:
+                pass
+    
+    def get(self, key):
+        conn = None
+        
+        with self._lock:
+            expired_list = self._pop_expired(time.monotonic())
+            idle_list = self._idle_map.get(key)
+            
+            if idle_list:
+                # most recently used connection is the least likely
+                #   to be closed by server
+                conn = idle_list.pop()[0]
+        
+        self._close_list(expired_list)
+        
+        return conn
+    
+    def put(self, key, conn):
+        with self._lock:
+            if not self._closed:
+                idle_list = self._idle_map.setdefault(key, [])
+                
+                if self._max_size is None or len(idle_list) < self._max_size:
+                    idle_list.append((conn, time.monotonic()))
+                    conn = None
+        
+        if conn is not None:
+            self._close_list((conn,))
+    
+    def close(self):
+        with self._lock:
+            self._closed = True
+            conn_list = [
+                    conn
+                    for idle_list in self._idle_map.values()
+                    for conn, idle_time in idle_list
+                    ]
+            self._idle_map.clear()
+        
+        self._close_list(conn_list)
@@ -0,0 +1,106 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import threading, re, hashlib, collections
+
+DEFAULT_MAX_SIZE = 100000 # remembered news items
+KEY_DIGEST_SIZE = 8
+
+def get_title_fingerprint(title):
+    return ' '.join(re.findall(r'\w+', title.lower()))
+
+def get_item_key(item, use_title=None):
+    key_str = item.url or item.raw_url or ''
+    
+    if use_title:
+        key_str = '{}\n{}'.format(
+                key_str, get_title_fingerprint(item.title or ''))
+    
+    return hashlib.blake2b(
+            key_str.encode('utf-8', 'replace'),
+            digest_size=KEY_DIGEST_SIZE,
+            ).digest()
+
+# remembers keys of seen news items (the least recently seen are
+#   forgotten first). keys are short digests, not urls, so memory is
+#   bounded by ``max_size``
+class DedupIndex:
+    def __init__(self, max_size=None, use_title=None):
+        if max_size is None:
+            max_size = DEFAULT_MAX_SIZE
+        
+        if use_title is None:
+            use_title = False
+        
+        self._max_size = max_size
+        self._use_title = use_title
+        self._lock = threading.Lock()
+        self._key_map = collections.OrderedDict()
+        self.dup_count = 0
+    
+    def get_key(self, item):
+        return get_item_key(item, use_title=self._use_title)
+    
+    # threadsafe function. remembers keys as seen
+    def add_keys(self, key_iter):
+        with self._lock:
+            for key in key_iter:
+                self._key_map[key] = None
+                self._key_map.move_to_end(key)
+                
+                if len(self._key_map) > self._max_size:
+                    self._key_map.popitem(last=False)
+    
+    # threadsafe function. returns items which were not seen before
+    #   and number of dropped items
+    def filter(self, result):
+        key_list = tuple(map(self.get_key, result))
+        new_list = []
+        
+        with self._lock:
+            for item, key in zip(result, key_list):
+                if key in self._key_map:
+                    self._key_map.move_to_end(key)
+                    continue
+                
+                self._key_map[key] = None
+                new_list.append(item)
+            
+            while len(self._key_map) > self._max_size:
+                self._key_map.popitem(last=False)
+            
+            dup_count = len(result) - len(new_list)
+            self.dup_count += dup_count
+        
+        return tuple(new_list), dup_count
+
+def wrap_on_result(dedup, on_result):
+    if dedup is None:
+        return on_result
+    
+    def dedup_on_result(data):
+        data.dup_count = 0
+        
+        if data.error is None:
+            data.result, data.dup_count = dedup.filter(data.result)
+        
+        if on_result is not None:
+            return on_result(data)
+    
+    return dedup_on_result
@@ -17,14 +17,20 @@
 
 assert str is not bytes
 
-import sys, threading, re
-from http import cookiejar
-from urllib import request
-from urllib import parse as url_parse
-from .lib_html_parse import html_parse
+import sys, threading, queue
+from . import news_item, services, url_canon
+
+# modules which are needed only for fetching and parsing are imported by
+#   functions, so importing of this module (and start of ``main_cli``)
+#   is cheap
 
 DEFAULT_CONCURRENCY = 20
 
+ENGINE_THREAD = 'thread'
+ENGINE_ASYNCIO = 'asyncio'
+ENGINE_LIST = (ENGINE_THREAD, ENGINE_ASYNCIO)
+DEFAULT_ENGINE = ENGINE_THREAD
+
 DEFAULT_URL_LIST = (
         'http://news.yandex.ru/politics.html',
         'http://news.yandex.ru/world.html',
@@ -63,8 +69,12 @@ DEFAULT_URL_LIST = (
 DEFAULT_TIMEOUT = 60.0
 DEFAULT_CONTENT_LENGTH = 10000000
 
+DEFAULT_ITER_QUEUE_SIZE = 100
+ITER_PUT_TIMEOUT = 0.1 # seconds
+
 class FetchNewsError(Exception):
-    pass
+    # HTTP status of unexpected response, if any
+    status = None
 
 class FetchYandexNewsError(FetchNewsError):
     pass
@@ -75,23 +85,34 @@ class FetchGoogleNewsError(FetchNewsError):
 class UnknownServiceFetchNewsError(FetchNewsError):
     pass
 
+# result of one url. ``result`` is tuple of ``news_item.NewsItem``,
+#   ``dup_count`` is set only with ``dedup``
 class Data:
-    pass
+    __slots__ = (
+            'url_id', 'url', 'attempt', 'error', 'error_kind', 'result',
+            'wire_size', 'transfer_time', 'cached', 'timings', 'dup_count',
+            )
+    
+    def __init__(self):
+        self.url_id = None
+        self.url = None
+        self.attempt = None
+        self.error = None
+        self.error_kind = None
+        self.result = None
+        self.wire_size = None
+        self.transfer_time = None
+        self.cached = None
+        self.timings = None
+        self.dup_count = None
 
 def result_line_format(data, show_url=None, url_separator=None):
     if show_url is None:
         show_url = False
     
     for result in data.result:
-        try:
-            result_title = result['title']
-        except KeyError:
-            result_title = None
-        
-        try:
-            result_url = result['url']
-        except KeyError:
-            result_url = None
+        result_title = result.title
+        result_url = result.url
         
         if result_title is None:
             continue
@@ -116,219 +137,305 @@ def result_line_format(data, show_url=None, url_separator=None):
         
         yield str(result_title).replace('\n', ' ... ')
 
-def ext_open(opener, *args,
-        headers=None, new_headers=None,
-        **kwargs):
-    if headers is not None:
-        spec_headers = headers
-    else:
-        spec_headers = opener.addheaders
+def fix_yandex_news_url(raw_url):
+    return url_canon.fix_yandex_news_url(raw_url)
+
+def fix_google_news_url(raw_url):
+    return url_canon.fix_google_news_url(raw_url)
+
+def fetch_resp(url, error_class, client=None):
+    from . import http_client
     
-    if new_headers is not None:
-        spec_headers = list(spec_headers)
-        spec_headers += new_headers
+    if client is None:
+        client = http_client.HttpClient(timeout=DEFAULT_TIMEOUT)
+        try:
+            return fetch_resp(url, error_class, client=client)
+        finally:
+            client.close()
     
-    orig_headers = opener.addheaders
-    opener.addheaders = spec_headers
-    try:
-        resp = opener.open(*args, **kwargs)
-    finally:
-        opener.addheaders = orig_headers
+    resp = client.get(url, content_length=DEFAULT_CONTENT_LENGTH)
+    
+    # redirects are not followed: we are redirected only to captcha
+    #   or to another service -- both are errors for us
+    if resp.status != 200:
+        error = error_class('resp.status != 200: {!r}'.format(resp.status))
+        error.status = resp.status
+        raise error
     
     return resp
 
-def fix_yandex_news_url(raw_url):
-    raw_url_obj = url_parse.urlsplit(raw_url)
-    raw_url_query = raw_url_obj.query
+def fetch_content(url, error_class, client=None):
+    return fetch_resp(url, error_class, client=client).body
+
+# checks response. page which is needed to parse is left with
+#   ``data.result`` equal to ``None``
+def handle_resp(data, resp, error_class, cache=None, cache_entry=None):
+    data.wire_size = resp.wire_size
+    data.transfer_time = resp.transfer_time
+    data.timings.update(resp.timings or ())
+    data.cached = False
+    data.result = None
     
-    if not raw_url_query:
-        return str(raw_url)
+    if resp.status == 304 and cache_entry is not None:
+        # page is not modified -- its previous parse result is still valid
+        cache.touch(data.url)
+        data.cached = True
+        data.result = cache_entry.result
+        return
     
-    raw_url_params = url_parse.parse_qs(raw_url_query)
-    cl4url_param = raw_url_params.get('cl4url', [''])[0]
+    if resp.status != 200:
+        error = error_class('resp.status != 200: {!r}'.format(resp.status))
+        error.status = resp.status
+        raise error
+
+def parse_yandex_news_content(url, content):
+    from . import news_extract
     
-    if not cl4url_param:
-        return str(raw_url)
+    if isinstance(content, bytes):
+        content = content.decode('utf-8', 'replace')
     
-    if not url_parse.urlparse(cl4url_param).scheme:
-        cl4url_param = 'http://{}'.format(cl4url_param)
+    result_list = []
     
-    return cl4url_param
-
-def fix_google_news_url(raw_url):
-    # nothing to fix yet for Google
-    return raw_url
+    for news_fields in news_extract.extract_news(
+            content, news_extract.YANDEX_NEWS_SPEC):
+        if 'title' not in news_fields:
+            continue
+        
+        raw_url = url_canon.join_url(url, news_fields.get('raw_url', ''))
+        result_list.append(news_item.NewsItem(
+                title=news_fields['title'],
+                raw_url=raw_url,
+                url=fix_yandex_news_url(raw_url),
+                text=news_fields.get('text'),
+                ))
+    
+    return tuple(result_list)
 
 def parse_yandex_news(url):
-    cookies = cookiejar.CookieJar()
-    opener = request.build_opener(
-            request.HTTPCookieProcessor(cookiejar=cookies),
-            )
-    
-    resp = ext_open(
-            opener,
-            url,
-            timeout=DEFAULT_TIMEOUT,
-            )
-    if resp.getcode() != 200 or resp.geturl() != url:
-        raise FetchYandexNewsError(
-                'resp.getcode() != 200 or resp.geturl() != url')
+    return parse_yandex_news_content(
+            url, fetch_content(url, FetchYandexNewsError))
+
+def parse_google_news_content(url, content):
+    from . import news_extract
     
-    content = resp.read(DEFAULT_CONTENT_LENGTH).decode(
-            'utf-8', 'replace')
+    if isinstance(content, bytes):
+        content = content.decode('utf-8', 'replace')
     
     result_list = []
     
-    news_item_nodes = tuple(html_parse.find_tags(
-            (html_parse.html_parse(content, use_min_attr_hack=True),),
-            'dl',
-            in_attrs={
-                    'class': 'b-news-item',
-                    },
-            ))
-    
-    for news_item_node in news_item_nodes:
-        result_item = {}
-        
-        news_title_nodes = tuple(html_parse.find_tags(
-                (news_item_node,),
-                'a',
-                in_attrs={
-                        'class': 'title',
-                        },
-                ))
-        news_text_nodes = tuple(html_parse.find_tags(
-                (news_item_node,),
-                'dd',
-                in_attrs={
-                        'class': 'text',
-                        },
-                ))
-        
-        if not news_title_nodes or \
-                not news_title_nodes[0].childs or \
-                not isinstance(news_title_nodes[0].childs[0], html_parse.DataHtmlNode):
+    for news_fields in news_extract.extract_news(
+            content, news_extract.GOOGLE_NEWS_SPEC):
+        if 'title' not in news_fields:
             continue
         
-        result_item['title'] = news_title_nodes[0].childs[0].data
-        result_item['raw_url'] = url_parse.urljoin(url, news_title_nodes[0].attrs.get('href', ''))
-        result_item['url'] = fix_yandex_news_url(result_item['raw_url'])
-        
-        if news_text_nodes and \
-                news_text_nodes[0].childs and \
-                isinstance(news_text_nodes[0].childs[0], html_parse.DataHtmlNode):
-            result_item['text'] = news_text_nodes[0].childs[0].data
-        
-        if result_item:
-            result_list.append(result_item)
+        raw_url = url_canon.join_url(url, news_fields.get('raw_url', ''))
+        result_list.append(news_item.NewsItem(
+                title=news_fields['title'],
+                raw_url=raw_url,
+                url=fix_google_news_url(raw_url),
+                ))
     
     return tuple(result_list)
 
 def parse_google_news(url):
-    cookies = cookiejar.CookieJar()
-    opener = request.build_opener(
-            request.HTTPCookieProcessor(cookiejar=cookies),
-            )
+    return parse_google_news_content(
+            url, fetch_content(url, FetchGoogleNewsError))
+
+YANDEX_NEWS_SERVICE = services.Service(
+        'yandex-news',
+        ('news.yandex.ru',),
+        parse_yandex_news_content,
+        FetchYandexNewsError,
+        url_pattern='^https?\:\/\/news\.yandex\.ru(\/|$)',
+        fix_url=fix_yandex_news_url,
+        )
+
+GOOGLE_NEWS_SERVICE = services.Service(
+        'google-news',
+        ('news.google.com', 'news.google.ru'),
+        parse_google_news_content,
+        FetchGoogleNewsError,
+        url_pattern='^https\:\/\/news\.google\.(com|ru)(\/|$)',
+        fix_url=fix_google_news_url,
+        )
+
+services.register_service(YANDEX_NEWS_SERVICE)
+services.register_service(GOOGLE_NEWS_SERVICE)
+
+def find_service(url):
+    # url from ``url_source`` may name its service
+    service_name = getattr(url, 'service', None)
     
-    resp = ext_open(
-            opener,
-            url,
-            timeout=DEFAULT_TIMEOUT,
-            )
-    if resp.getcode() != 200 or resp.geturl() != url:
-        raise FetchGoogleNewsError(
-                'resp.getcode() != 200 or resp.geturl() != url')
+    if service_name is not None:
+        service = services.registry.get(service_name)
+    else:
+        service = services.find_service(url)
     
-    content = resp.read(DEFAULT_CONTENT_LENGTH).decode(
-            'utf-8', 'replace')
+    if service is None:
+        raise UnknownServiceFetchNewsError(
+                'unknown service')
     
-    result_list = []
+    return service
+
+def fetch_service_resp(client, service, url, cache_entry=None):
+    headers = {}
     
-    news_item_nodes = tuple(html_parse.find_tags(
-            (html_parse.html_parse(content, use_min_attr_hack=True),),
-            'a',
-            in_attrs={
-                    'class': 'article',
-                    },
-            ))
+    if service.headers is not None:
+        headers.update(service.headers)
     
-    for news_item_node in news_item_nodes:
-        result_item = {}
-        
-        result_item['raw_url'] = url_parse.urljoin(url, news_item_node.attrs.get('href', ''))
-        result_item['url'] = fix_google_news_url(result_item['raw_url'])
+    if cache_entry is not None:
+        from . import http_cache
         
-        news_title_nodes = tuple(html_parse.find_tags(
-                (news_item_node,),
-                'span',
-                in_attrs={
-                        'class': 'titletext',
-                        },
-                ))
-        
-        if not news_title_nodes or \
-                not news_title_nodes[0].childs or \
-                not isinstance(news_title_nodes[0].childs[0], html_parse.DataHtmlNode):
-            continue
-        
-        result_item['title'] = news_title_nodes[0].childs[0].data
-        
-        if result_item:
-            result_list.append(result_item)
+        headers.update(http_cache.cond_headers(cache_entry))
     
-    return tuple(result_list)
+    return client.get(
+            url,
+            headers=headers,
+            content_length=service.content_length or DEFAULT_CONTENT_LENGTH,
+            timeout=service.timeout or DEFAULT_TIMEOUT,
+            )
 
-def fetch_news_thread(fetch_lock, url_iter, on_begin=None, on_result=None):
+def fetch_news_thread(sched, on_begin=None, on_result=None,
+        client=None, cache=None, stage=None, retry_policy=None):
+    from . import parse_stage, retry
+    
+    if stage is None:
+        stage = parse_stage.ParseStage(cache=cache)
+    
+    if retry_policy is None:
+        retry_policy = retry.RetryPolicy()
+    
     while True:
         data = Data()
         
-        with fetch_lock:
-            try:
-                data.url_id, data.url = next(url_iter)
-            except (StopIteration, EnvironmentError):
-                return
+        item = sched.get()
+        
+        if item is None:
+            return
+        
+        data.url_id, data.url, data.attempt = item
+        data.error_kind = None
+        data.timings = {}
         
-        if on_begin is not None:
+        if on_begin is not None and data.attempt == 1:
             on_begin(data)
         
         try:
-            if re.match(
-                    '^https?\:\/\/news\.yandex\.ru(\/|$)',
-                    data.url, flags=re.M|re.S):
-                data.result = parse_yandex_news(data.url)
-            elif re.match(
-                    '^https\:\/\/news\.google\.(com|ru)(\/|$)',
-                    data.url, flags=re.M|re.S):
-                data.result = parse_google_news(data.url)
+            service = find_service(data.url)
+            
+            if cache is not None:
+                cache_entry = cache.get(data.url)
             else:
-                raise UnknownServiceFetchNewsError(
-                        'unknown service')
+                cache_entry = None
+            
+            resp = fetch_service_resp(
+                    client, service, data.url, cache_entry=cache_entry)
+            handle_resp(data, resp, service.error_class,
+                    cache=cache, cache_entry=cache_entry)
         except Exception:
             data.error = sys.exc_info()
+            data.error_kind = retry.classify_error(data.error[1])
         else:
             data.error = None
         
+        if data.error is not None and \
+                retry_policy.should_retry(data.error_kind, data.attempt):
+            # worker does not wait for the retry, it takes next url
+            sched.retry(item, retry_policy.get_delay(data.attempt))
+            sched.release(data.url)
+            continue
+        
+        sched.release(data.url)
+        
+        if data.error is None and data.result is None:
+            # ``stage`` will deliver the result when page is parsed
+            stage.parse(data, resp, service.parse_content,
+                    on_result=on_result)
+            continue
+        
         if on_result is not None:
             on_result(data)
 
+# url ids of ``skip_url_ids`` (done in previous run) are not fetched
+def enumerate_urls(url_list, skip_url_ids=None):
+    if not skip_url_ids:
+        return enumerate(url_list)
+    
+    return (
+            (url_id, url)
+            for url_id, url in enumerate(url_list)
+            if url_id not in skip_url_ids
+            )
+
 def fetch_news(conc=None, url_list=None,
-        on_begin=None, on_result=None, on_done=None):
+        on_begin=None, on_result=None, on_done=None, engine=None,
+        pool_size=None, pool_idle_timeout=None, cache=None,
+        parse_procs=None, host_limits=None, default_host_limit=None,
+        retry_policy=None, cancel_event=None, dedup=None, metrics=None,
+        skip_url_ids=None):
+    if engine is None:
+        engine = DEFAULT_ENGINE
+    
+    if engine == ENGINE_ASYNCIO:
+        from . import fetch_news_async
+        
+        fetch_news_async.fetch_news_async(
+                conc=conc,
+                url_list=url_list,
+                on_begin=on_begin,
+                on_result=on_result,
+                on_done=on_done,
+                pool_size=pool_size,
+                pool_idle_timeout=pool_idle_timeout,
+                cache=cache,
+                parse_procs=parse_procs,
+                host_limits=host_limits,
+                default_host_limit=default_host_limit,
+                retry_policy=retry_policy,
+                cancel_event=cancel_event,
+                dedup=dedup,
+                metrics=metrics,
+                skip_url_ids=skip_url_ids,
+                )
+        return
+    
+    if engine != ENGINE_THREAD:
+        raise ValueError('unknown engine: {!r}'.format(engine))
+    
     if conc is None:
         conc = DEFAULT_CONCURRENCY
     
     if url_list is None:
         url_list = DEFAULT_URL_LIST
     
-    fetch_lock = threading.RLock()
-    url_iter = enumerate(url_list)
+    from . import http_client, parse_stage, host_sched
+    from . import dedup as dedup_mod, metrics as metrics_mod
+    
+    on_result = metrics_mod.wrap_on_result(
+            metrics, dedup_mod.wrap_on_result(dedup, on_result))
+    sched = host_sched.HostScheduler(
+            enumerate_urls(url_list, skip_url_ids=skip_url_ids),
+            host_limits=host_limits,
+            default_limit=default_host_limit,
+            cancel_event=cancel_event,
+            )
+    client = http_client.HttpClient(
+            pool_size=pool_size,
+            idle_timeout=pool_idle_timeout,
+            timeout=DEFAULT_TIMEOUT,
+            )
+    stage = parse_stage.ParseStage(procs=parse_procs, cache=cache)
     
     thread_list = tuple(
             threading.Thread(
                     target=lambda: fetch_news_thread(
-                            fetch_lock,
-                            url_iter,
+                            sched,
                             on_begin=on_begin,
                             on_result=on_result,
+                            client=client,
+                            cache=cache,
+                            stage=stage,
+                            retry_policy=retry_policy,
                             ),
                     )
             for thread_i in range(conc)
@@ -341,7 +448,51 @@ def fetch_news(conc=None, url_list=None,
         for thread in thread_list:
             thread.join()
         
+        client.close()
+        stage.close()
+        
+        if cache is not None:
+            cache.evict()
+        
         if on_done is not None:
             on_done()
     
     threading.Thread(target=in_thread).start()
+
+# yields ``Data`` of every url as soon as it is done. workers wait
+#   while ``queue_size`` results are not taken yet. closing the
+#   generator cancels urls which are not started yet
+def iter_news(url_list=None, queue_size=None, **kwargs):
+    if queue_size is None:
+        queue_size = DEFAULT_ITER_QUEUE_SIZE
+    
+    result_queue = queue.Queue(maxsize=queue_size)
+    cancel_event = threading.Event()
+    done_mark = object()
+    
+    def put(item):
+        while not cancel_event.is_set():
+            try:
+                result_queue.put(item, timeout=ITER_PUT_TIMEOUT)
+            except queue.Full:
+                continue
+            
+            return
+    
+    fetch_news(
+            url_list=url_list,
+            on_result=put,
+            on_done=lambda: put(done_mark),
+            cancel_event=cancel_event,
+            **kwargs)
+    
+    try:
+        while True:
+            data = result_queue.get()
+            
+            if data is done_mark:
+                break
+            
+            yield data
+    finally:
+        cancel_event.set()
@@ -0,0 +1,505 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import sys, threading, time, socket, inspect, asyncio, ssl
+from . import fetch_news, http_client, conn_pool, parse_stage, host_sched
+from . import retry, dedup as dedup_mod, metrics as metrics_mod
+
+DEFAULT_ASYNC_CONCURRENCY = 200
+READ_CHUNK_SIZE = 65536
+
+class AsyncFetchNewsError(fetch_news.FetchNewsError):
+    pass
+
+def parse_resp_head(head):
+    head_lines = head.decode('iso-8859-1').split('\r\n')
+    status_line = head_lines[0].split(None, 2)
+    
+    if len(status_line) < 2 or not status_line[0].startswith('HTTP/') or \
+            not status_line[1].isdigit():
+        raise AsyncFetchNewsError(
+                'bad status line: {!r}'.format(head_lines[0]))
+    
+    headers = {}
+    
+    for head_line in head_lines[1:]:
+        name, sep, value = head_line.partition(':')
+        
+        if not sep:
+            continue
+        
+        headers[name.strip().lower()] = value.strip()
+    
+    return status_line[0], int(status_line[1]), headers
+
+# like ``http.client``: responses to ``HEAD`` and responses with
+#   these statuses never have body, whatever their headers say
+def has_no_body(status, method):
+    return method == 'HEAD' or 100 <= status < 200 or status in (204, 304)
+
+# reads body by pieces and feeds them to ``decoder``. returns
+#   number of read bytes and flag: ``True`` if body has been read
+#   to its end, so connection may be used again
+async def read_resp_body(reader, method, status, headers, decoder,
+        chunk_list):
+    if has_no_body(status, method):
+        return 0, True
+    
+    wire_size = 0
+    
+    async def read_part(size):
+        nonlocal wire_size
+        
+        while size > 0 and not decoder.done:
+            chunk = await reader.readexactly(min(READ_CHUNK_SIZE, size))
+            wire_size += len(chunk)
+            size -= len(chunk)
+            chunk_list.append(decoder.feed(chunk))
+        
+        return not size
+    
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        while True:
+            size_line = await reader.readline()
+            chunk_size = int(size_line.split(b';', 1)[0].strip(), 16)
+            
+            if not chunk_size:
+                while (await reader.readline()).strip():
+                    # skipping trailer
+                    pass
+                
+                chunk_list.append(decoder.flush())
+                
+                return wire_size, True
+            
+            if not await read_part(chunk_size):
+                return wire_size, False
+            
+            await reader.readexactly(2)
+    
+    if 'content-length' in headers:
+        complete = await read_part(int(headers['content-length']))
+        
+        if complete:
+            chunk_list.append(decoder.flush())
+        
+        return wire_size, complete
+    
+    while not decoder.done:
+        chunk = await reader.read(READ_CHUNK_SIZE)
+        
+        if not chunk:
+            chunk_list.append(decoder.flush())
+            break
+        
+        wire_size += len(chunk)
+        chunk_list.append(decoder.feed(chunk))
+    
+    return wire_size, False
+
+def close_stream_conn(conn):
+    reader, writer = conn
+    writer.close()
+
+# asyncio counterpart of ``http_client.HttpClient``. must be used
+#   from one event loop only
+class AsyncHttpClient:
+    def __init__(self, pool_size=None, idle_timeout=None):
+        self._ssl_context = None
+        self._pool = conn_pool.ConnPool(
+                close_stream_conn,
+                max_size=pool_size,
+                idle_timeout=idle_timeout,
+                )
+    
+    def close(self):
+        self._pool.close()
+    
+    async def _new_conn(self, key, timings):
+        scheme, host, port = key
+        
+        if scheme == 'https':
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            
+            ssl_context = self._ssl_context
+            server_hostname = host
+        else:
+            ssl_context = None
+            server_hostname = None
+        
+        begin_time = time.monotonic()
+        addr_list = await asyncio.get_running_loop().getaddrinfo(
+                host, port, type=socket.SOCK_STREAM)
+        connect_time = time.monotonic()
+        timings[http_client.PHASE_DNS] = connect_time - begin_time
+        
+        error = None
+        
+        for family, type, proto, canonname, sockaddr in addr_list:
+            try:
+                conn = await asyncio.open_connection(
+                        sockaddr[0], sockaddr[1],
+                        ssl=ssl_context, server_hostname=server_hostname)
+            except OSError as e:
+                error = e
+                continue
+            
+            timings[http_client.PHASE_CONNECT] = \
+                    time.monotonic() - connect_time
+            
+            return conn
+        
+        raise error
+    
+    # ``timeout`` is not used here: whole request is limited by caller
+    async def get(self, url, headers=None, content_length=None, timeout=None):
+        if content_length is None:
+            content_length = http_client.DEFAULT_CONTENT_LENGTH
+        
+        key, host, path = http_client.split_url(url)
+        req_headers = {
+                'Host': host,
+                'User-Agent': http_client.USER_AGENT,
+                'Accept-Encoding': http_client.ACCEPT_ENCODING,
+                }
+        
+        if headers is not None:
+            req_headers.update(headers)
+        
+        req = ''.join(
+                ['GET {} HTTP/1.1\r\n'.format(path)] +
+                ['{}: {}\r\n'.format(name, value)
+                        for name, value in req_headers.items()] +
+                ['\r\n'],
+                ).encode('ascii')
+        
+        timings = {http_client.PHASE_DNS: 0.0, http_client.PHASE_CONNECT: 0.0}
+        begin_time = time.monotonic()
+        conn = self._pool.get(key)
+        
+        while True:
+            reused = conn is not None
+            
+            if not reused:
+                conn = await self._new_conn(key, timings)
+            
+            reader, writer = conn
+            
+            try:
+                request_time = time.monotonic()
+                writer.write(req)
+                version, status, headers = parse_resp_head(
+                        await reader.readuntil(b'\r\n\r\n'))
+            except (asyncio.IncompleteReadError, ConnectionError):
+                writer.close()
+                
+                if not reused:
+                    raise
+                
+                # server has closed the idle connection. just try
+                #   again with the fresh one
+                conn = None
+                continue
+            except:
+                writer.close()
+                raise
+            
+            break
+        
+        head_time = time.monotonic()
+        timings[http_client.PHASE_TTFB] = head_time - request_time
+        chunk_list = []
+        
+        try:
+            decoder = http_client.ContentDecoder(
+                    headers.get('content-encoding'), content_length)
+            wire_size, complete = await read_resp_body(
+                    reader, 'GET', status, headers, decoder, chunk_list)
+        except:
+            writer.close()
+            raise
+        
+        if complete and version != 'HTTP/1.0' and \
+                headers.get('connection', '').lower() != 'close':
+            self._pool.put(key, conn)
+        else:
+            writer.close()
+        
+        end_time = time.monotonic()
+        timings[http_client.PHASE_DOWNLOAD] = end_time - head_time
+        
+        return http_client.HttpResponse(
+                status,
+                headers,
+                b''.join(chunk_list),
+                wire_size=wire_size,
+                transfer_time=end_time - begin_time,
+                timings=timings,
+                )
+
+# wraps ``host_sched.HostScheduler`` for coroutines of one event loop
+class AsyncHostScheduler:
+    def __init__(self, sched):
+        self._sched = sched
+        self._cond = asyncio.Condition()
+    
+    async def get(self):
+        async with self._cond:
+            while True:
+                item, delay = self._sched.poll()
+                
+                if item is not None:
+                    return item
+                
+                if self._sched.finished:
+                    return None
+                
+                try:
+                    await asyncio.wait_for(self._cond.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+    
+    def retry(self, item, delay):
+        self._sched.retry(item, delay)
+    
+    async def release(self, url):
+        self._sched.release(url)
+        
+        async with self._cond:
+            self._cond.notify_all()
+
+# error of callback is reported by the event loop and does not stop
+#   the worker, so other urls are fetched and ``on_done`` is called
+def report_callback_error(callback_name, data):
+    asyncio.get_running_loop().call_exception_handler({
+            'message': '{} callback failed for url {!r}'.format(
+                    callback_name, data.url),
+            'exception': sys.exc_info()[1],
+            })
+
+async def fetch_news_worker(sched, client, stage, retry_policy,
+        on_begin=None, on_result=None, cache=None):
+    while True:
+        data = fetch_news.Data()
+        
+        item = await sched.get()
+        
+        if item is None:
+            return
+        
+        data.url_id, data.url, data.attempt = item
+        data.error_kind = None
+        data.timings = {}
+        
+        if on_begin is not None and data.attempt == 1:
+            try:
+                on_begin(data)
+            except Exception:
+                report_callback_error('on_begin', data)
+        
+        try:
+            service = fetch_news.find_service(data.url)
+            
+            if cache is not None:
+                cache_entry = cache.get(data.url)
+            else:
+                cache_entry = None
+            
+            resp = await asyncio.wait_for(
+                    fetch_news.fetch_service_resp(
+                            client, service, data.url,
+                            cache_entry=cache_entry),
+                    service.timeout or fetch_news.DEFAULT_TIMEOUT,
+                    )
+            fetch_news.handle_resp(data, resp, service.error_class,
+                    cache=cache, cache_entry=cache_entry)
+        except Exception:
+            data.error = sys.exc_info()
+            data.error_kind = retry.classify_error(data.error[1])
+        else:
+            data.error = None
+        
+        if data.error is not None and \
+                retry_policy.should_retry(data.error_kind, data.attempt):
+            sched.retry(item, retry_policy.get_delay(data.attempt))
+            await sched.release(data.url)
+            continue
+        
+        await sched.release(data.url)
+        
+        if data.error is None and data.result is None:
+            try:
+                await stage.parse_async(data, resp, service.parse_content)
+            except Exception:
+                data.error = sys.exc_info()
+                data.error_kind = retry.ERROR_PARSE
+        
+        if on_result is not None:
+            try:
+                on_result_ret = on_result(data)
+                
+                if inspect.isawaitable(on_result_ret):
+                    await on_result_ret
+            except Exception:
+                report_callback_error('on_result', data)
+
+async def fetch_news_coro(conc=None, url_list=None,
+        on_begin=None, on_result=None,
+        pool_size=None, pool_idle_timeout=None, cache=None,
+        parse_procs=None, host_limits=None, default_host_limit=None,
+        retry_policy=None, cancel_event=None, dedup=None, metrics=None,
+        skip_url_ids=None):
+    if conc is None:
+        conc = DEFAULT_ASYNC_CONCURRENCY
+    
+    if url_list is None:
+        url_list = fetch_news.DEFAULT_URL_LIST
+    
+    if pool_size is None:
+        pool_size = conc
+    
+    if retry_policy is None:
+        retry_policy = retry.RetryPolicy()
+    
+    on_result = metrics_mod.wrap_on_result(
+            metrics, dedup_mod.wrap_on_result(dedup, on_result))
+    
+    # at most ``conc`` pages and ``host_sched.DEFAULT_LOOKAHEAD`` urls
+    #   are in memory at the same time
+    sched = AsyncHostScheduler(host_sched.HostScheduler(
+            fetch_news.enumerate_urls(url_list, skip_url_ids=skip_url_ids),
+            host_limits=host_limits,
+            default_limit=default_host_limit,
+            cancel_event=cancel_event,
+            ))
+    client = AsyncHttpClient(
+            pool_size=pool_size,
+            idle_timeout=pool_idle_timeout,
+            )
+    stage = parse_stage.ParseStage(procs=parse_procs, cache=cache)
+    
+    try:
+        await asyncio.gather(*(
+                fetch_news_worker(
+                        sched,
+                        client,
+                        stage,
+                        retry_policy,
+                        on_begin=on_begin,
+                        on_result=on_result,
+                        cache=cache,
+                        )
+                for worker_i in range(conc)
+                ))
+    finally:
+        client.close()
+        stage.close()
+
+def fetch_news_async(conc=None, url_list=None,
+        on_begin=None, on_result=None, on_done=None,
+        pool_size=None, pool_idle_timeout=None, cache=None,
+        parse_procs=None, host_limits=None, default_host_limit=None,
+        retry_policy=None, cancel_event=None, dedup=None, metrics=None,
+        skip_url_ids=None):
+    def in_thread():
+        try:
+            asyncio.run(fetch_news_coro(
+                    conc=conc,
+                    url_list=url_list,
+                    on_begin=on_begin,
+                    on_result=on_result,
+                    pool_size=pool_size,
+                    pool_idle_timeout=pool_idle_timeout,
+                    cache=cache,
+                    parse_procs=parse_procs,
+                    host_limits=host_limits,
+                    default_host_limit=default_host_limit,
+                    retry_policy=retry_policy,
+                    cancel_event=cancel_event,
+                    dedup=dedup,
+                    metrics=metrics,
+                    skip_url_ids=skip_url_ids,
+                    ))
+        finally:
+            if cache is not None:
+                cache.evict()
+            
+            if on_done is not None:
+                on_done()
+    
+    threading.Thread(target=in_thread).start()
+
+# async counterpart of ``fetch_news.iter_news()``, works in the current
+#   event loop. ``on_result`` of the engine awaits free place in the
+#   queue, so the fetching never gets far ahead of the consumer.
+#   closing the generator cancels urls which are not started yet
+async def aiter_news(url_list=None, queue_size=None, **kwargs):
+    if queue_size is None:
+        queue_size = fetch_news.DEFAULT_ITER_QUEUE_SIZE
+    
+    result_queue = asyncio.Queue(maxsize=queue_size)
+    cancel_event = threading.Event()
+    done = False
+    done_mark = object()
+    
+    async def put(data):
+        if not cancel_event.is_set():
+            await result_queue.put(data)
+    
+    async def run():
+        nonlocal done
+        
+        try:
+            await fetch_news_coro(
+                    url_list=url_list,
+                    on_result=put,
+                    cancel_event=cancel_event,
+                    **kwargs)
+        finally:
+            done = True
+            
+            if result_queue.empty():
+                # wakes the consumer up
+                result_queue.put_nowait(done_mark)
+    
+    run_task = asyncio.ensure_future(run())
+    
+    try:
+        while not done or not result_queue.empty():
+            data = await result_queue.get()
+            
+            if data is done_mark:
+                break
+            
+            yield data
+        
+        await run_task
+    finally:
+        # task cancellation alone is not enough: ``asyncio.wait_for()``
+        #   may swallow it, and the worker would go on fetching
+        cancel_event.set()
+        
+        while not result_queue.empty():
+            # workers waiting for free place drop their results now
+            result_queue.get_nowait()
+        
+        if not run_task.done():
+            run_task.cancel()
+            await asyncio.gather(run_task, return_exceptions=True)
@@ -18,15 +18,20 @@
 
 assert str is not bytes
 
-import threading
 import tkinter
 from tkinter import ttk, scrolledtext, filedialog
 from . import tk_mt, tk_async
-from .. import read_list, fetch_news
+from .. import url_source, fetch_news
 
 DEFAULT_MAIN_WINDOW_WIDTH = 700
 DEFAULT_MAIN_WINDOW_HEIGHT = 500
 
+# new lines are shown not more often than every ``TEXT_FLUSH_DELAY``,
+#   and only last ``MAX_TEXT_LINES`` of them are kept in the text widget.
+#   ``Copy`` takes all lines from ``MainWindow._result_lines``
+TEXT_FLUSH_DELAY = 50 # milliseconds
+MAX_TEXT_LINES = 5000
+
 class MainWindow:
     def __init__(self):
         self._root = tkinter.Tk()
@@ -66,6 +71,18 @@ class MainWindow:
                 text='Special URL Separator',
                 )
         
+        self._async_engine_var = tkinter.BooleanVar()
+        self._async_engine = ttk.Checkbutton(
+                master=self._top_frame, variable=self._async_engine_var,
+                text='Async Engine',
+                )
+        
+        self._use_cache_var = tkinter.BooleanVar()
+        self._use_cache = ttk.Checkbutton(
+                master=self._top_frame, variable=self._use_cache_var,
+                text='Use Cache',
+                )
+        
         self._text = scrolledtext.ScrolledText(master=self._center_frame)
         self._text.propagate(False)
         self._text.config(state=tkinter.DISABLED)
@@ -91,6 +108,8 @@ class MainWindow:
         self._source_urls_file_entry.pack(side=tkinter.TOP, fill=tkinter.X, padx=10, pady=10)
         self._show_url.pack(side=tkinter.TOP, fill=tkinter.X, padx=10, pady=10)
         self._spec_url_sep.pack(side=tkinter.TOP, fill=tkinter.X, padx=10, pady=10)
+        self._async_engine.pack(side=tkinter.TOP, fill=tkinter.X, padx=10, pady=10)
+        self._use_cache.pack(side=tkinter.TOP, fill=tkinter.X, padx=10, pady=10)
         self._text.pack(fill=tkinter.BOTH, expand=True)
         self._select_source_urls_file_button.pack(side=tkinter.LEFT, padx=10, pady=10)
         self._reload_button.pack(side=tkinter.LEFT, padx=10, pady=10)
@@ -102,6 +121,11 @@ class MainWindow:
         self._center_frame.pack(fill=tkinter.BOTH, expand=True)
         self._bottom_frame.pack(side=tkinter.BOTTOM, fill=tkinter.X)
         
+        self._result_lines = []
+        self._pending_lines = []
+        self._text_line_count = 0
+        self._text_flush_id = None
+        
         self._busy_state = False
         self._busy_state_id = object()
         self._set_status('Ready')
@@ -148,12 +172,29 @@ class MainWindow:
         show_url = self._show_url_var.get()
         spec_url_sep = self._spec_url_sep_var.get()
         
+        if self._async_engine_var.get():
+            engine = fetch_news.ENGINE_ASYNCIO
+        else:
+            engine = fetch_news.ENGINE_THREAD
+        
+        if self._use_cache_var.get():
+            from .. import http_cache
+            
+            try:
+                cache = http_cache.HttpCache(
+                        http_cache.get_default_cache_dir())
+            except EnvironmentError:
+                self._root.bell()
+                return
+        else:
+            cache = None
+        
         if url_list_file_path:
             try:
-                url_list = read_list.read_list(url_list_file_path)
+                url_list = url_source.UrlSource((url_list_file_path,))
             except EnvironmentError:
                 # ``EnvironmentError`` will never excepted HERE,
-                #   because ``read_list.read_list()`` -- is lazy generator
+                #   because ``url_source.UrlSource`` -- opens file lazily
                 
                 self._root.bell()
                 return
@@ -167,11 +208,21 @@ class MainWindow:
         self._source_urls_file_entry.config(state=tkinter.DISABLED)
         self._show_url.config(state=tkinter.DISABLED)
         self._spec_url_sep.config(state=tkinter.DISABLED)
+        self._async_engine.config(state=tkinter.DISABLED)
+        self._use_cache.config(state=tkinter.DISABLED)
         self._select_source_urls_file_button.config(state=tkinter.DISABLED)
         self._reload_button.config(state=tkinter.DISABLED)
         self._copy_button.config(state=tkinter.DISABLED)
         self._close_button.config(state=tkinter.DISABLED)
         
+        if self._text_flush_id is not None:
+            self._root.after_cancel(self._text_flush_id)
+            self._text_flush_id = None
+        
+        self._result_lines = []
+        self._pending_lines = []
+        self._text_line_count = 0
+        
         self._text.config(state=tkinter.NORMAL)
         self._text.delete('1.0', tkinter.END)
         self._text.config(state=tkinter.DISABLED)
@@ -183,12 +234,15 @@ class MainWindow:
                     busy_state_id, show_url, spec_url_sep, data))
         
         def on_done():
-            self._tk_mt.push(lambda: self._on_reload_done(busy_state_id))
+            self._tk_mt.push(lambda: self._on_reload_done(
+                    busy_state_id, url_list))
         
         fetch_news.fetch_news(
                 url_list=url_list,
                 on_result=on_result,
                 on_done=on_done,
+                engine=engine,
+                cache=cache,
                 )
     
     def _on_reload_result(self, busy_state_id, show_url, spec_url_sep, data):
@@ -203,23 +257,62 @@ class MainWindow:
         else:
             url_separator = None
         
+        result_lines = tuple(fetch_news.result_line_format(
+                data, show_url=show_url, url_separator=url_separator))
+        self._result_lines.extend(result_lines)
+        self._pending_lines.extend(result_lines)
+        
+        if self._pending_lines and self._text_flush_id is None:
+            self._text_flush_id = self._root.after(
+                    TEXT_FLUSH_DELAY, self._flush_text)
+    
+    def _flush_text(self):
+        self._text_flush_id = None
+        
+        if not self._pending_lines:
+            return
+        
+        pending_lines = self._pending_lines[-MAX_TEXT_LINES:]
+        self._pending_lines = []
+        
         self._text.config(state=tkinter.NORMAL)
-        for result_line in fetch_news.result_line_format(
-                data, show_url=show_url, url_separator=url_separator):
-            self._text.insert(tkinter.END, '{}\n'.format(result_line))
+        self._text.insert(tkinter.END, ''.join(
+                '{}\n'.format(line) for line in pending_lines))
+        self._text_line_count += len(pending_lines)
+        
+        if self._text_line_count > MAX_TEXT_LINES:
+            self._text.delete('1.0', '{}.0'.format(
+                    self._text_line_count - MAX_TEXT_LINES + 1))
+            self._text_line_count = MAX_TEXT_LINES
+        
         self._text.config(state=tkinter.DISABLED)
     
-    def _on_reload_done(self, busy_state_id):
+    def _on_reload_done(self, busy_state_id, url_list):
         if busy_state_id != self._busy_state_id:
             return
         
+        if self._text_flush_id is not None:
+            self._root.after_cancel(self._text_flush_id)
+        
+        self._flush_text()
+        
         self._busy_state = False
         self._busy_state_id = object()
-        self._set_status('Done')
+        
+        if url_list is not None and url_list.read_error is not None:
+            self._root.bell()
+            self._set_status('Url list error: {}'.format(url_list.read_error))
+        elif len(self._result_lines) > self._text_line_count:
+            self._set_status('Done ({} lines, last {} are shown)'.format(
+                    len(self._result_lines), self._text_line_count))
+        else:
+            self._set_status('Done')
         
         self._source_urls_file_entry.config(state=tkinter.NORMAL)
         self._show_url.config(state=tkinter.NORMAL)
         self._spec_url_sep.config(state=tkinter.NORMAL)
+        self._async_engine.config(state=tkinter.NORMAL)
+        self._use_cache.config(state=tkinter.NORMAL)
         self._select_source_urls_file_button.config(state=tkinter.NORMAL)
         self._reload_button.config(state=tkinter.NORMAL)
         self._copy_button.config(state=tkinter.NORMAL)
@@ -230,6 +323,6 @@ class MainWindow:
             self._root.bell()
             return
         
-        content = self._text.get('1.0', tkinter.END).rstrip()
+        content = '\n'.join(self._result_lines).rstrip()
         self._root.clipboard_clear()
         self._root.clipboard_append(content)
@@ -19,29 +19,53 @@ assert str is not bytes
 
 import sys
 import threading
+import time
 import queue
 
-TK_PULL_DELAY = 100 # milliseconds
+# fallback polling, for the case when wake-up event can not be generated
+#   (Tcl without threads support, main loop is not started yet)
+TK_PULL_DELAY = 500 # milliseconds
+TK_DRAIN_TIME = 0.02 # seconds, then Tk handles its own events
+
+WAKE_EVENT = '<<TkMtWake>>'
 
 DESTROY = object()
 
-# this is Multi-Thread support for Tk
+# this is Multi-Thread support for Tk. pushing thread wakes Tk loop up by
+#   virtual event, only one event is pending at a time, and Tk loop runs
+#   all queued callbacks in one batch
 class TkMt:
     def __init__(self, root):
         self._root = root
         self._queue = queue.Queue()
         self._closed = False
+        self._wake_lock = threading.Lock()
+        self._wake_pending = False
         
+        self._root.bind(WAKE_EVENT, lambda event: self._drain())
         self._root.after(TK_PULL_DELAY, self._pull_handle)
     
     def close(self):
         self._closed = True
     
-    def _pull_handle(self):
+    def _drain(self):
         if self._closed:
             return
         
+        with self._wake_lock:
+            self._wake_pending = False
+        
+        end_time = time.monotonic() + TK_DRAIN_TIME
+        
         while True:
+            if time.monotonic() >= end_time:
+                # the rest is run after Tk handles its own events
+                with self._wake_lock:
+                    self._wake_pending = True
+                
+                self._root.after_idle(self._drain)
+                return
+            
             try:
                 f = self._queue.get_nowait()
             except queue.Empty:
@@ -53,11 +77,20 @@ class TkMt:
                         self._root.destroy()
                         return
                     
-                    self._root.after_idle(f)
+                    f()
+                except Exception:
+                    self._root.report_callback_exception(*sys.exc_info())
                 finally:
                     self._queue.task_done()
+    
+    def _pull_handle(self):
+        if self._closed:
+            return
         
-        self._root.after(TK_PULL_DELAY, self._pull_handle)
+        self._drain()
+        
+        if not self._closed:
+            self._root.after(TK_PULL_DELAY, self._pull_handle)
     
     # threadsafe function
     def push(self, callback):
@@ -67,6 +100,18 @@ class TkMt:
         assert callable(callback) or callback == DESTROY
         
         self._queue.put(callback)
+        
+        with self._wake_lock:
+            if self._wake_pending:
+                return
+            
+            self._wake_pending = True
+        
+        try:
+            self._root.event_generate(WAKE_EVENT, when='tail')
+        except Exception:
+            # callback will be run by fallback polling
+            pass
     
     # threadsafe function
     def push_destroy(self):
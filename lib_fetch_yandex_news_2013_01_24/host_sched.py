@@ -0,0 +1,248 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import threading, time, collections, heapq, itertools
+from urllib import parse as url_parse
+
+DEFAULT_LOOKAHEAD = 1000 # urls buffered in memory
+
+class HostLimit:
+    def __init__(self, rate=None, max_conn=None, burst=None):
+        if burst is None:
+            burst = 1.0
+        
+        # ``rate`` -- requests per second, ``max_conn`` -- requests in flight
+        self.rate = rate
+        self.max_conn = max_conn
+        self.burst = burst
+
+def parse_host_limit(spec):
+    rate_str, sep, max_conn_str = spec.partition(':')
+    rate = float(rate_str) if rate_str else None
+    max_conn = int(max_conn_str) if max_conn_str else None
+    
+    if rate is not None and rate <= 0.0 or \
+            max_conn is not None and max_conn <= 0:
+        raise ValueError('invalid host limit: {!r}'.format(spec))
+    
+    return HostLimit(rate=rate, max_conn=max_conn)
+
+def get_url_host(url):
+    try:
+        return url_parse.urlsplit(url).hostname or ''
+    except ValueError:
+        return ''
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self._rate = rate
+        self._burst = burst
+        self._tokens = burst
+        self._last_time = time.monotonic()
+    
+    # seconds to wait for a token
+    def get_delay(self, now):
+        self._tokens = min(
+                self._burst,
+                self._tokens + (now - self._last_time) * self._rate,
+                )
+        self._last_time = now
+        
+        if self._tokens >= 1.0:
+            return 0.0
+        
+        return (1.0 - self._tokens) / self._rate
+    
+    def take(self):
+        self._tokens -= 1.0
+
+class HostState:
+    def __init__(self, limit):
+        self.limit = limit
+        self.queue = collections.deque()
+        self.in_flight = 0
+        
+        if limit.rate is not None:
+            self.bucket = TokenBucket(limit.rate, limit.burst)
+        else:
+            self.bucket = None
+
+# hands out urls so that requests to different hosts are interleaved
+#   and every host keeps its rate and its max requests in flight.
+#   only ``lookahead`` urls are taken from ``url_iter`` ahead of time
+class HostScheduler:
+    def __init__(self, url_iter, host_limits=None, default_limit=None,
+            lookahead=None, cancel_event=None):
+        if host_limits is None:
+            host_limits = {}
+        
+        if default_limit is None:
+            default_limit = HostLimit()
+        
+        if lookahead is None:
+            lookahead = DEFAULT_LOOKAHEAD
+        
+        self._url_iter = url_iter
+        self._host_limits = {
+                host.lower(): limit for host, limit in host_limits.items()}
+        self._default_limit = default_limit
+        self._lookahead = lookahead
+        self._cancel_event = cancel_event
+        self._cond = threading.Condition(threading.RLock())
+        self._host_map = collections.OrderedDict()
+        self._delayed = []
+        self._delayed_seq = itertools.count()
+        self._buffered = 0
+        self._in_flight = 0
+        self._exhausted = False
+    
+    def _get_host_state(self, host):
+        host_state = self._host_map.get(host)
+        
+        if host_state is None:
+            host_state = self._host_map[host] = HostState(
+                    self._host_limits.get(host, self._default_limit))
+        
+        return host_state
+    
+    def _fill(self):
+        while not self._exhausted and self._buffered < self._lookahead:
+            try:
+                url_id, url = next(self._url_iter)
+            except (StopIteration, EnvironmentError):
+                self._exhausted = True
+                break
+            
+            self._get_host_state(get_url_host(url)).queue.append(
+                    (url_id, url, 1))
+            self._buffered += 1
+    
+    def _cancel(self):
+        # urls in flight are not touched, they will be released as usual
+        self._exhausted = True
+        self._delayed.clear()
+        self._buffered = 0
+        
+        for host_state in self._host_map.values():
+            host_state.queue.clear()
+    
+    def _pop_delayed(self, now):
+        while self._delayed and self._delayed[0][0] <= now:
+            ready_time, seq, item = heapq.heappop(self._delayed)
+            
+            # retried url goes before not yet tried urls of its host
+            self._get_host_state(get_url_host(item[1])).queue.appendleft(
+                    item)
+    
+    @property
+    def finished(self):
+        with self._cond:
+            return self._exhausted and not self._buffered and \
+                    not self._in_flight
+    
+    # non-blocking. returns url item ``(url_id, url, attempt)``,
+    #   or ``None`` and seconds to wait (``None`` seconds -- wait
+    #   for ``release()``)
+    def poll(self):
+        with self._cond:
+            if self._cancel_event is not None and self._cancel_event.is_set():
+                self._cancel()
+            
+            self._fill()
+            
+            now = time.monotonic()
+            self._pop_delayed(now)
+            
+            if self._delayed:
+                min_delay = self._delayed[0][0] - now
+            else:
+                min_delay = None
+            
+            for host, host_state in self._host_map.items():
+                if not host_state.queue:
+                    continue
+                
+                if host_state.limit.max_conn is not None and \
+                        host_state.in_flight >= host_state.limit.max_conn:
+                    continue
+                
+                if host_state.bucket is not None:
+                    delay = host_state.bucket.get_delay(now)
+                    
+                    if delay > 0.0:
+                        if min_delay is None or delay < min_delay:
+                            min_delay = delay
+                        
+                        continue
+                    
+                    host_state.bucket.take()
+                
+                item = host_state.queue.popleft()
+                host_state.in_flight += 1
+                self._buffered -= 1
+                self._in_flight += 1
+                
+                # next time other hosts go first
+                self._host_map.move_to_end(host)
+                
+                return item, None
+            
+            return None, min_delay
+    
+    # blocking. returns ``None`` when all urls are done
+    def get(self):
+        with self._cond:
+            while True:
+                item, delay = self.poll()
+                
+                if item is not None:
+                    return item
+                
+                if self.finished:
+                    return None
+                
+                self._cond.wait(delay)
+    
+    # puts url item back. must be called before ``release()`` of the item
+    def retry(self, item, delay):
+        url_id, url, attempt = item
+        
+        with self._cond:
+            heapq.heappush(self._delayed, (
+                    time.monotonic() + delay,
+                    next(self._delayed_seq),
+                    (url_id, url, attempt + 1),
+                    ))
+            self._buffered += 1
+            self._cond.notify_all()
+    
+    def release(self, url):
+        with self._cond:
+            host = get_url_host(url)
+            host_state = self._host_map[host]
+            host_state.in_flight -= 1
+            self._in_flight -= 1
+            
+            # host with rate limit keeps its state, so its rate is kept
+            #   even if the host has no urls for a while
+            if not host_state.queue and not host_state.in_flight and \
+                    host_state.bucket is None:
+                del self._host_map[host]
+            
+            self._cond.notify_all()
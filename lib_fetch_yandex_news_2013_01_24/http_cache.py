@@ -0,0 +1,164 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import os, os.path, time, json, hashlib, tempfile
+from . import news_item
+
+DEFAULT_MAX_AGE = 7 * 24 * 60 * 60 # seconds
+DEFAULT_MAX_SIZE = 100000000 # bytes
+
+ENTRY_SUFFIX = '.json'
+
+def get_default_cache_dir():
+    return os.path.join(
+            os.path.expanduser('~'), '.cache', 'fetch-yandex-news')
+
+class CacheEntry:
+    def __init__(self, etag, last_modified, result):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.result = result
+
+def cond_headers(entry):
+    if entry is None:
+        return None
+    
+    headers = {}
+    
+    if entry.etag is not None:
+        headers['If-None-Match'] = entry.etag
+    
+    if entry.last_modified is not None:
+        headers['If-Modified-Since'] = entry.last_modified
+    
+    return headers
+
+# on-disk cache of parsed results, keyed by url. one file per entry,
+#   files are replaced atomically, so the cache may be shared between
+#   threads and processes
+class HttpCache:
+    def __init__(self, path, max_age=None, max_size=None):
+        if max_age is None:
+            max_age = DEFAULT_MAX_AGE
+        
+        if max_size is None:
+            max_size = DEFAULT_MAX_SIZE
+        
+        self._path = path
+        self._max_age = max_age
+        self._max_size = max_size
+        
+        os.makedirs(self._path, exist_ok=True)
+    
+    def _entry_path(self, url):
+        return os.path.join(
+                self._path,
+                hashlib.sha1(url.encode('utf-8', 'replace')).hexdigest() +
+                        ENTRY_SUFFIX,
+                )
+    
+    def get(self, url):
+        entry_path = self._entry_path(url)
+        
+        try:
+            if time.time() - os.path.getmtime(entry_path) > self._max_age:
+                os.remove(entry_path)
+                return None
+            
+            with open(entry_path, 'r', encoding='utf-8') as fd:
+                entry_obj = json.load(fd)
+        except (EnvironmentError, ValueError):
+            return None
+        
+        if entry_obj.get('url') != url:
+            return None
+        
+        return CacheEntry(
+                entry_obj.get('etag'),
+                entry_obj.get('last_modified'),
+                tuple(map(news_item.from_dict, entry_obj.get('result', ()))),
+                )
+    
+    def put(self, url, headers, result):
+        etag = headers.get('etag')
+        last_modified = headers.get('last-modified')
+        
+        if etag is None and last_modified is None:
+            # nothing to validate with later
+            return
+        
+        entry_obj = {
+                'url': url,
+                'etag': etag,
+                'last_modified': last_modified,
+                'result': list(map(news_item.to_dict, result)),
+                }
+        
+        tmp_fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self._path)
+        try:
+            with open(tmp_fd, 'w', encoding='utf-8') as fd:
+                json.dump(entry_obj, fd, ensure_ascii=False)
+            
+            os.replace(tmp_path, self._entry_path(url))
+        except:
+            os.remove(tmp_path)
+            raise
+    
+    def touch(self, url):
+        try:
+            os.utime(self._entry_path(url))
+        except EnvironmentError:
+            pass
+    
+    def evict(self):
+        now = time.time()
+        entry_list = []
+        
+        for entry_name in os.listdir(self._path):
+            if not entry_name.endswith(ENTRY_SUFFIX):
+                continue
+            
+            entry_path = os.path.join(self._path, entry_name)
+            
+            try:
+                entry_stat = os.stat(entry_path)
+                
+                if now - entry_stat.st_mtime > self._max_age:
+                    os.remove(entry_path)
+                    continue
+            except EnvironmentError:
+                continue
+            
+            entry_list.append(
+                    (entry_stat.st_mtime, entry_stat.st_size, entry_path))
+        
+        entry_list.sort()
+        total_size = sum(entry_size for entry_time, entry_size, entry_path
+                in entry_list)
+        
+        for entry_time, entry_size, entry_path in entry_list:
+            if total_size <= self._max_size:
+                break
+            
+            try:
+                os.remove(entry_path)
+            except EnvironmentError:
+                continue
+            
+            total_size -= entry_size
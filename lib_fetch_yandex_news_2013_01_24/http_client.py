@@ -0,0 +1,332 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import sys, time, socket, zlib
+from http import client as http_client
+from urllib import parse as url_parse
+from . import conn_pool
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_POOL_SIZE = 20 # idle connections per host
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_CONTENT_LENGTH = 10000000
+READ_CHUNK_SIZE = 65536
+BROTLI_FEED_SIZE = 1024
+
+# phases of request in ``HttpResponse.timings``. ``dns`` and ``connect``
+#   are zero for reused keep-alive connection
+PHASE_DNS = 'dns'
+PHASE_CONNECT = 'connect'
+PHASE_TTFB = 'ttfb'
+PHASE_DOWNLOAD = 'download'
+
+USER_AGENT = 'Python-urllib/{}.{}'.format(*sys.version_info[:2])
+
+if brotli is not None:
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+else:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+class HttpClientError(Exception):
+    pass
+
+class HttpResponse:
+    def __init__(self, status, headers, body,
+            wire_size=None, transfer_time=None, timings=None):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.wire_size = wire_size
+        self.transfer_time = transfer_time
+        self.timings = timings
+
+# streaming decoder for ``Content-Encoding``. ``limit`` is applied
+#   to decoded size, so compressed bomb can not exhaust memory
+class ContentDecoder:
+    def __init__(self, encoding, limit):
+        if encoding is None:
+            encoding = 'identity'
+        
+        self._encoding = encoding.strip().lower()
+        self._limit = limit
+        self._zlib_obj = None
+        self._brotli_obj = None
+        self._deflate_head = b''
+        self.size = 0
+        
+        if self._encoding in ('gzip', 'x-gzip'):
+            self._zlib_obj = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif self._encoding == 'br' and brotli is not None:
+            self._brotli_obj = brotli.Decompressor()
+        elif self._encoding not in ('identity', 'deflate'):
+            raise HttpClientError(
+                    'unsupported content encoding: {!r}'.format(encoding))
+    
+    @property
+    def done(self):
+        return self.size >= self._limit
+    
+    def _add(self, data):
+        data = data[:self._limit - self.size]
+        self.size += len(data)
+        
+        return data
+    
+    def feed(self, data):
+        if self.done or not data:
+            return b''
+        
+        if self._encoding == 'deflate' and self._zlib_obj is None:
+            # the header is checked by its 2 bytes, which may come in
+            #   different pieces
+            data = self._deflate_head + data
+            
+            if len(data) < 2:
+                self._deflate_head = data
+                return b''
+            
+            self._deflate_head = b''
+            self._start_deflate(data)
+        
+        if self._zlib_obj is not None:
+            return self._add(self._zlib_obj.decompress(
+                    data, self._limit - self.size))
+        
+        if self._brotli_obj is not None:
+            # brotli can not limit its output, so feeding it by small pieces
+            chunk_list = []
+            
+            for pos in range(0, len(data), BROTLI_FEED_SIZE):
+                chunk_list.append(self._add(self._brotli_obj.process(
+                        data[pos:pos + BROTLI_FEED_SIZE])))
+                
+                if self.done:
+                    break
+            
+            return b''.join(chunk_list)
+        
+        return self._add(data)
+    
+    def _start_deflate(self, data):
+        # some servers send raw deflate stream without zlib header
+        if len(data) >= 2 and data[0] & 0x0f == 8 and \
+                (data[0] << 8 | data[1]) % 31 == 0:
+            self._zlib_obj = zlib.decompressobj(zlib.MAX_WBITS)
+        else:
+            self._zlib_obj = zlib.decompressobj(-zlib.MAX_WBITS)
+    
+    def flush(self):
+        if self._deflate_head:
+            # whole body is shorter than the header
+            self._start_deflate(self._deflate_head)
+            chunk = self._add(self._zlib_obj.decompress(
+                    self._deflate_head, self._limit - self.size))
+            self._deflate_head = b''
+            
+            return chunk + self.flush()
+        
+        if self.done or self._zlib_obj is None:
+            return b''
+        
+        return self._add(self._zlib_obj.flush(self._limit - self.size))
+
+def split_url(url):
+    url_obj = url_parse.urlsplit(url)
+    
+    if url_obj.scheme not in ('http', 'https'):
+        raise HttpClientError(
+                'unsupported url scheme: {!r}'.format(url_obj.scheme))
+    
+    if not url_obj.hostname:
+        raise HttpClientError('url has no host: {!r}'.format(url))
+    
+    if url_obj.scheme == 'https':
+        default_port = 443
+    else:
+        default_port = 80
+    
+    path = url_obj.path or '/'
+    
+    if url_obj.query:
+        path = '{}?{}'.format(path, url_obj.query)
+    
+    key = url_obj.scheme, url_obj.hostname, url_obj.port or default_port
+    
+    return key, url_obj.netloc.rpartition('@')[2], path
+
+# ``socket.create_connection()`` which resolves the host separately,
+#   so time of DNS lookup is known
+def create_timed_connection(timings, address, timeout=None,
+        source_address=None):
+    host, port = address
+    
+    begin_time = time.monotonic()
+    addr_list = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    timings[PHASE_DNS] = time.monotonic() - begin_time
+    
+    error = None
+    
+    for family, type, proto, canonname, sockaddr in addr_list:
+        try:
+            return socket.create_connection(
+                    sockaddr[:2], timeout=timeout,
+                    source_address=source_address)
+        except OSError as e:
+            error = e
+    
+    raise error
+
+# thread-safe HTTP client. keep-alive connections are shared
+#   between all threads and all urls of the same host
+class HttpClient:
+    def __init__(self, pool_size=None, idle_timeout=None, timeout=None):
+        if pool_size is None:
+            pool_size = DEFAULT_POOL_SIZE
+        
+        if timeout is None:
+            timeout = DEFAULT_TIMEOUT
+        
+        self._timeout = timeout
+        self._pool = conn_pool.ConnPool(
+                lambda conn: conn.close(),
+                max_size=pool_size,
+                idle_timeout=idle_timeout,
+                )
+    
+    def close(self):
+        self._pool.close()
+    
+    def _new_conn(self, key, timings):
+        scheme, host, port = key
+        
+        if scheme == 'https':
+            conn = http_client.HTTPSConnection(
+                    host, port, timeout=self._timeout)
+        else:
+            conn = http_client.HTTPConnection(
+                    host, port, timeout=self._timeout)
+        
+        conn._create_connection = \
+                lambda *args, **kwargs: create_timed_connection(
+                        timings, *args, **kwargs)
+        
+        return conn
+    
+    def get(self, url, headers=None, content_length=None, timeout=None):
+        if content_length is None:
+            content_length = DEFAULT_CONTENT_LENGTH
+        
+        if timeout is None:
+            timeout = self._timeout
+        
+        key, host, path = split_url(url)
+        req_headers = {
+                'Host': host,
+                'User-Agent': USER_AGENT,
+                'Accept-Encoding': ACCEPT_ENCODING,
+                }
+        
+        if headers is not None:
+            req_headers.update(headers)
+        
+        timings = {PHASE_DNS: 0.0, PHASE_CONNECT: 0.0}
+        begin_time = time.monotonic()
+        conn = self._pool.get(key)
+        
+        while True:
+            reused = conn is not None
+            
+            if not reused:
+                conn = self._new_conn(key, timings)
+            
+            conn.timeout = timeout
+            
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            
+            try:
+                if not reused:
+                    connect_time = time.monotonic()
+                    conn.connect()
+                    timings[PHASE_CONNECT] = time.monotonic() - \
+                            connect_time - timings[PHASE_DNS]
+                
+                request_time = time.monotonic()
+                conn.request('GET', path, headers=req_headers)
+                resp = conn.getresponse()
+            except (http_client.RemoteDisconnected, ConnectionError):
+                conn.close()
+                
+                if not reused:
+                    raise
+                
+                # server has closed the idle connection. just try
+                #   again with the fresh one
+                conn = None
+                continue
+            except:
+                conn.close()
+                raise
+            
+            break
+        
+        head_time = time.monotonic()
+        timings[PHASE_TTFB] = head_time - request_time
+        resp_headers = {
+                name.lower(): value for name, value in resp.getheaders()}
+        chunk_list = []
+        wire_size = 0
+        
+        try:
+            decoder = ContentDecoder(
+                    resp_headers.get('content-encoding'), content_length)
+            
+            while not decoder.done:
+                chunk = resp.read(READ_CHUNK_SIZE)
+                
+                if not chunk:
+                    chunk_list.append(decoder.flush())
+                    break
+                
+                wire_size += len(chunk)
+                chunk_list.append(decoder.feed(chunk))
+        except:
+            conn.close()
+            raise
+        
+        if resp.isclosed() and not resp.will_close:
+            self._pool.put(key, conn)
+        else:
+            conn.close()
+        
+        end_time = time.monotonic()
+        timings[PHASE_DOWNLOAD] = end_time - head_time
+        
+        return HttpResponse(
+                resp.status,
+                resp_headers,
+                b''.join(chunk_list),
+                wire_size=wire_size,
+                transfer_time=end_time - begin_time,
+                timings=timings,
+                )
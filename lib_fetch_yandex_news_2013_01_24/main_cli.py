@@ -17,34 +17,110 @@
 
 assert str is not bytes
 
-import threading, argparse
-from . import read_list, fetch_news
+import threading, time, argparse, signal
+from . import url_source, fetch_news, host_sched, retry, seen_store
+from . import output_writers
+
+# modules which are needed only with some options are imported when
+#   the options are given, so start is fast
 
 class UserError(Exception):
     pass
 
+# ``SIGTERM`` stops like Ctrl-C does, so ``finally`` blocks save
+#   output and state
+def on_sigterm(signum, frame):
+    raise SystemExit(128 + signum)
+
 def on_begin(ui_lock, data):
     with ui_lock:
         print('[{!r}] begin: {!r}'.format(data.url_id, data.url))
 
-def on_result(ui_lock, show_url, url_separator, out_fd, data):
+def on_skip(ui_lock, line, reason):
+    with ui_lock:
+        print('skip url: {!r}: {}'.format(line, reason))
+
+def on_url_list_error(ui_lock, path, error):
+    with ui_lock:
+        print('url list error: {!r}: {!r}'.format(path, error))
+
+def on_result(ui_lock, writer, store, seen, cancel_event, data):
     with ui_lock:
         if data.error is not None:
-            print('[{!r}] error: {!r}: {!r}: {!r}'.format(
-                    data.url_id, data.url,
+            print('[{!r}] error ({}, attempt {!r}): {!r}: {!r}: {!r}'.format(
+                    data.url_id, data.error_kind, data.attempt, data.url,
                     data.error[0], data.error[1]))
             return
         
-        for result_line in fetch_news.result_line_format(
-                data, show_url=show_url, url_separator=url_separator):
-            out_fd.write('{}\n'.format(result_line))
-        out_fd.flush()
+        if store is not None and not cancel_event.is_set():
+            try:
+                store.write(data)
+            except Exception as e:
+                # the error is raised again by ``store.close()``
+                print('db error: {!r}'.format(e))
+                cancel_event.set()
+        
+        if seen is not None:
+            data.result = seen.filter(data.result)
+        
+        try:
+            writer.write(data)
+        except Exception as e:
+            # the error is raised again by ``writer.close()``
+            print('output error: {!r}'.format(e))
+            cancel_event.set()
+            return
+        
+        if data.cached:
+            cached_mark = ', not modified'
+        else:
+            cached_mark = ''
         
-        print('[{!r}] pass: {!r}'.format(data.url_id, data.url))
+        print('[{!r}] pass: {!r} ({!r} bytes, {:.3f} s{})'.format(
+                data.url_id, data.url, data.wire_size, data.transfer_time,
+                cached_mark))
 
-def on_done(ui_lock, done_event):
+def write_metrics(path, summary):
+    import os, json, tempfile
+    
+    dir_path = os.path.dirname(os.path.abspath(path))
+    tmp_fd, tmp_path = tempfile.mkstemp(
+            prefix='.metrics-', suffix='.tmp', dir=dir_path)
+    
+    try:
+        with open(tmp_fd, 'w', encoding='utf-8', newline='\n') as fd:
+            json.dump(summary, fd, indent=4, sort_keys=True)
+            fd.write('\n')
+        
+        # ``mkstemp()`` makes file readable only by its owner
+        os.chmod(tmp_path, seen_store.get_file_mode(path))
+        os.replace(tmp_path, path)
+    except:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            # interrupted after ``os.replace()``, the file is written
+            pass
+        
+        raise
+
+def on_done(ui_lock, dedup_index, run_metrics, metrics_out, done_event):
     with ui_lock:
-        print('done!')
+        if run_metrics is not None:
+            try:
+                summary = run_metrics.finish()
+                
+                if metrics_out is not None:
+                    write_metrics(metrics_out, summary)
+            except Exception as e:
+                print('metrics error: {!r}'.format(e))
+        
+        if dedup_index is not None:
+            print('done! ({!r} duplicates dropped)'.format(
+                    dedup_index.dup_count))
+        else:
+            print('done!')
+        
         done_event.set()
 
 def main():
@@ -54,7 +130,22 @@ def main():
     parser.add_argument(
             '--urls',
             metavar='URL-LIST-PATH',
-            help='path to url list file',
+            help='path to url list file (``-`` for stdin). '
+                    'file may be gzipped (``.gz``). line is url or JSON object '
+                    'like ``{"url": ..., "priority": ..., "service": ...}``',
+            )
+    parser.add_argument(
+            '--url-dedup-max-size',
+            metavar='URL-COUNT',
+            type=int,
+            help='max number of urls remembered for skipping duplicates '
+                    'in url list',
+            )
+    parser.add_argument(
+            '--url-priority-window',
+            metavar='URL-COUNT',
+            type=int,
+            help='number of urls of url list reordered by priority',
             )
     parser.add_argument(
             '--show-url',
@@ -71,30 +162,401 @@ def main():
             metavar='OUTPUT-PATH',
             help='path to output result file',
             )
+    parser.add_argument(
+            '--format',
+            choices=output_writers.FORMAT_LIST,
+            help='output file format: ``text`` (news titles, one per line), '
+                    '``jsonl`` or ``csv`` (all fields of news). '
+                    'default is ``{}``'.format(output_writers.DEFAULT_FORMAT),
+            )
+    parser.add_argument(
+            '--flush-interval',
+            metavar='SECONDS',
+            type=float,
+            help='flush output file not more often than every SECONDS. '
+                    'default is {}'.format(
+                            output_writers.DEFAULT_FLUSH_INTERVAL),
+            )
+    parser.add_argument(
+            '--fsync',
+            action='store_true',
+            help='sync output file to disk on every flush',
+            )
+    parser.add_argument(
+            '--db',
+            metavar='DB-PATH',
+            help='path to SQLite database keeping all fetched news. '
+                    'use ``fetch-yandex-news-query`` to query it',
+            )
+    parser.add_argument(
+            '--engine',
+            choices=fetch_news.ENGINE_LIST,
+            help='fetch engine: ``thread`` (one thread per request) or '
+                    '``asyncio`` (many requests on one thread). '
+                    'default is ``{}``'.format(fetch_news.DEFAULT_ENGINE),
+            )
+    parser.add_argument(
+            '--conc',
+            metavar='CONCURRENCY',
+            type=int,
+            help='number of simultaneous requests',
+            )
+    parser.add_argument(
+            '--pool-size',
+            metavar='POOL-SIZE',
+            type=int,
+            help='max number of idle keep-alive connections per host',
+            )
+    parser.add_argument(
+            '--cache-dir',
+            metavar='CACHE-DIR-PATH',
+            help='path to directory of response cache. '
+                    'not modified pages are not downloaded and parsed again',
+            )
+    parser.add_argument(
+            '--cache-max-age',
+            metavar='SECONDS',
+            type=float,
+            help='max age of cache entry',
+            )
+    parser.add_argument(
+            '--cache-max-size',
+            metavar='BYTES',
+            type=int,
+            help='max total size of cache entries',
+            )
+    parser.add_argument(
+            '--parse-procs',
+            metavar='PROCESS-COUNT',
+            type=int,
+            help='parse pages in separate processes',
+            )
+    parser.add_argument(
+            '--host-limit',
+            metavar='HOST=RATE:MAX-CONN',
+            action='append',
+            help='limit requests per second and requests in flight '
+                    'for the host. any of limits may be omitted, '
+                    'like ``news.yandex.ru=2`` or ``news.yandex.ru=:4``. '
+                    'may be given several times',
+            )
+    parser.add_argument(
+            '--default-host-limit',
+            metavar='RATE:MAX-CONN',
+            type=host_sched.parse_host_limit,
+            help='limit for hosts without ``--host-limit``',
+            )
+    parser.add_argument(
+            '--max-attempts',
+            metavar='ATTEMPTS',
+            type=int,
+            help='max attempts to fetch url failed with transient error '
+                    '(timeout, connection reset, 5xx response). '
+                    'default is {}'.format(retry.DEFAULT_MAX_ATTEMPTS),
+            )
+    parser.add_argument(
+            '--dedup',
+            action='store_true',
+            help='drop news which have been already got from other urls',
+            )
+    parser.add_argument(
+            '--dedup-title',
+            action='store_true',
+            help='with ``--dedup``: news are the same only if their '
+                    'titles are the same too',
+            )
+    parser.add_argument(
+            '--dedup-max-size',
+            metavar='ITEM-COUNT',
+            type=int,
+            help='max number of news remembered for ``--dedup``',
+            )
+    parser.add_argument(
+            '--watch',
+            metavar='SECONDS',
+            type=float,
+            help='do not exit, fetch urls again every SECONDS. '
+                    'only news not seen before are appended to output file',
+            )
+    parser.add_argument(
+            '--seen',
+            metavar='SEEN-STORE-PATH',
+            help='path to store of seen news for ``--watch``. '
+                    'default is output file path with ``.seen`` suffix',
+            )
+    parser.add_argument(
+            '--seen-ttl',
+            metavar='SECONDS',
+            type=float,
+            help='news not seen for SECONDS are forgotten. '
+                    'default is {}'.format(seen_store.DEFAULT_TTL),
+            )
+    parser.add_argument(
+            '--checkpoint',
+            action='store_true',
+            help='write journal of urls whose results are in output file',
+            )
+    parser.add_argument(
+            '--checkpoint-path',
+            metavar='CHECKPOINT-PATH',
+            help='path to journal for ``--checkpoint`` and ``--resume``. '
+                    'default is output file path with ``.checkpoint`` suffix',
+            )
+    parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='continue run which was stopped: skip urls of '
+                    'checkpoint journal and append to output file. '
+                    'implies ``--checkpoint``',
+            )
+    parser.add_argument(
+            '--metrics-out',
+            metavar='METRICS-PATH',
+            help='path to JSON file of run metrics: timings of request '
+                    'phases (dns, connect, ttfb, download, parse), '
+                    'bytes, items and errors. with ``--watch`` '
+                    'it is rewritten after every run',
+            )
+    parser.add_argument(
+            '--metrics-hook',
+            metavar='MODULE:NAME',
+            help='object with ``on_record(data)`` and/or '
+                    '``on_summary(summary)`` methods, receiving metrics',
+            )
+    parser.add_argument(
+            '--profile',
+            metavar='PROFILE-PATH',
+            help='profile all threads and write merged ``pstats`` file. '
+                    'time spent in fetching, parsing and output is shown',
+            )
     args = parser.parse_args()
     
+    signal.signal(signal.SIGTERM, on_sigterm)
+    
+    if args.profile is None:
+        run(args)
+        return
+    
+    from . import profiling
+    
+    profiler = profiling.ThreadProfiler()
+    profiler.start()
+    
+    try:
+        run(args)
+    finally:
+        stats = profiler.stop()
+        stats.dump_stats(args.profile)
+        
+        for category, seconds in profiling.attribute(stats).items():
+            print('profile: {}: {:.3f} s'.format(category, seconds))
+
+def run(args):
     if args.out is None:
         raise UserError('args.out is None')
     
+    host_limits = {}
+    
+    for host_limit_arg in args.host_limit or ():
+        host, sep, host_limit_spec = host_limit_arg.partition('=')
+        
+        if not sep or not host:
+            raise UserError(
+                    'invalid host limit: {!r}'.format(host_limit_arg))
+        
+        try:
+            host_limits[host] = host_sched.parse_host_limit(host_limit_spec)
+        except ValueError as e:
+            raise UserError(str(e))
+    
+    if args.metrics_out is not None or args.metrics_hook is not None:
+        from . import metrics
+    
+    if args.metrics_hook is not None:
+        try:
+            metrics_hook = metrics.load_hook(args.metrics_hook)
+        except (ValueError, ImportError, AttributeError) as e:
+            raise UserError(str(e))
+    else:
+        metrics_hook = None
+    
     ui_lock = threading.RLock()
+    cancel_event = threading.Event()
     
-    if args.urls is not None:
-        url_list = read_list.read_list(args.urls)
+    if args.cache_dir is not None:
+        from . import http_cache
+        
+        cache = http_cache.HttpCache(
+                args.cache_dir,
+                max_age=args.cache_max_age,
+                max_size=args.cache_max_size,
+                )
     else:
-        url_list = None
-    
-    with open(args.out, 'w', encoding='utf-8', newline='\n') as out_fd:
-        done_event = threading.Event()
-        fetch_news.fetch_news(
-                url_list=url_list,
-                on_begin=lambda data: on_begin(ui_lock, data),
-                on_result=lambda data: on_result(
-                        ui_lock,
-                        args.show_url,
-                        args.url_separator,
-                        out_fd,
-                        data,
+        cache = None
+    
+    if args.watch is not None:
+        if args.seen is not None:
+            seen_path = args.seen
+        else:
+            seen_path = '{}.seen'.format(args.out)
+        
+        seen = seen_store.SeenStore(seen_path, ttl=args.seen_ttl)
+        out_mode = 'a'
+    else:
+        seen = None
+        out_mode = 'w'
+    
+    if args.checkpoint or args.resume:
+        from . import checkpoint
+        
+        if args.watch is not None:
+            raise UserError('``--checkpoint`` can not be used with ``--watch``')
+        
+        if args.checkpoint_path is not None:
+            checkpoint_path = args.checkpoint_path
+        else:
+            checkpoint_path = '{}.checkpoint'.format(args.out)
+        
+        journal = checkpoint.CheckpointJournal(
+                checkpoint_path, resume=args.resume, fsync=args.fsync)
+        
+        if args.resume:
+            checkpoint.truncate_output(args.out, journal.offset)
+            out_mode = 'a'
+            
+            print('resume: {!r} urls are done'.format(
+                    len(journal.done_url_ids)))
+        
+        skip_url_ids = journal.done_url_ids
+        on_flush = journal.record
+    else:
+        journal = None
+        skip_url_ids = None
+        on_flush = None
+    
+    if args.format is not None:
+        format_name = args.format
+    else:
+        format_name = output_writers.DEFAULT_FORMAT
+    
+    with open(args.out, out_mode, encoding='utf-8', newline='\n') as out_fd:
+        writer = output_writers.OutputWriter(
+                out_fd,
+                output_writers.create_formatter(
+                        format_name,
+                        show_url=args.show_url,
+                        url_separator=args.url_separator,
+                        write_header=out_fd.tell() == 0,
                         ),
-                on_done=lambda: on_done(ui_lock, done_event),
+                flush_interval=args.flush_interval,
+                fsync=args.fsync,
+                on_flush=on_flush,
                 )
-        done_event.wait()
+        
+        if args.db is not None:
+            from . import sqlite_store
+            
+            store = sqlite_store.SqliteStore(args.db)
+        else:
+            store = None
+        
+        try:
+            while True:
+                begin_time = time.monotonic()
+                
+                if args.dedup:
+                    from . import dedup
+                    
+                    dedup_index = dedup.DedupIndex(
+                            max_size=args.dedup_max_size,
+                            use_title=args.dedup_title,
+                            )
+                else:
+                    dedup_index = None
+                
+                if journal is not None and dedup_index is not None:
+                    journal.attach_dedup(dedup_index)
+                
+                if args.metrics_out is not None or metrics_hook is not None:
+                    run_metrics = metrics.RunMetrics(hook=metrics_hook)
+                else:
+                    run_metrics = None
+                
+                if args.urls is not None:
+                    url_list = url_source.UrlSource(
+                            (args.urls,),
+                            dedup_max_size=args.url_dedup_max_size,
+                            priority_window=args.url_priority_window,
+                            on_skip=lambda line, reason: on_skip(
+                                    ui_lock, line, reason),
+                            on_error=lambda path, error: on_url_list_error(
+                                    ui_lock, path, error),
+                            )
+                else:
+                    url_list = None
+                
+                done_event = threading.Event()
+                fetch_news.fetch_news(
+                        conc=args.conc,
+                        url_list=url_list,
+                        engine=args.engine,
+                        pool_size=args.pool_size,
+                        cache=cache,
+                        parse_procs=args.parse_procs,
+                        host_limits=host_limits,
+                        default_host_limit=args.default_host_limit,
+                        retry_policy=retry.RetryPolicy(
+                                max_attempts=args.max_attempts),
+                        cancel_event=cancel_event,
+                        dedup=dedup_index,
+                        metrics=run_metrics,
+                        skip_url_ids=skip_url_ids,
+                        on_begin=lambda data: on_begin(ui_lock, data),
+                        on_result=lambda data: on_result(
+                                ui_lock, writer, store, seen, cancel_event,
+                                data),
+                        on_done=lambda: on_done(
+                                ui_lock,
+                                dedup_index,
+                                run_metrics,
+                                args.metrics_out,
+                                done_event,
+                                ),
+                        )
+                done_event.wait()
+                
+                if url_list is not None:
+                    print('url list: {!r} invalid, {!r} duplicate urls '
+                            'skipped'.format(
+                                    url_list.invalid_count, url_list.dup_count))
+                    
+                    if url_list.read_error is not None:
+                        raise UserError('url list is not read to its end: '
+                                '{}'.format(url_list.read_error))
+                
+                if args.watch is None:
+                    break
+                
+                seen.save()
+                
+                time.sleep(max(
+                        0.0, args.watch - (time.monotonic() - begin_time)))
+        finally:
+            # urls which are not started yet are not fetched after stop
+            cancel_event.set()
+            
+            # news are written and then seen store is saved under
+            #   ``ui_lock``, so stopped pass does not leave news which are
+            #   seen, but not written (or written, but not seen)
+            try:
+                with ui_lock:
+                    writer.close()
+                    
+                    if seen is not None:
+                        seen.save()
+            finally:
+                if journal is not None:
+                    journal.close()
+                
+                if store is not None:
+                    store.close()
@@ -0,0 +1,112 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import sys, datetime, json, csv, argparse, sqlite3
+from . import output_writers, sqlite_store
+
+def parse_time(value):
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    
+    try:
+        return datetime.datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+                'invalid time: {!r}'.format(value))
+
+def main():
+    parser = argparse.ArgumentParser(
+            description='utility for querying news kept by '
+                    '``fetch-yandex-news --db``.',
+            )
+    parser.add_argument(
+            'db',
+            metavar='DB-PATH',
+            help='path to SQLite database',
+            )
+    parser.add_argument(
+            '--source',
+            metavar='SOURCE-URL',
+            help='only news fetched from this url',
+            )
+    parser.add_argument(
+            '--domain',
+            metavar='DOMAIN',
+            help='only news linking to this domain',
+            )
+    parser.add_argument(
+            '--since',
+            metavar='TIME',
+            type=parse_time,
+            help='only news fetched at TIME or later. '
+                    'TIME is unix time or ``YYYY-MM-DD[THH:MM[:SS]]``',
+            )
+    parser.add_argument(
+            '--until',
+            metavar='TIME',
+            type=parse_time,
+            help='only news fetched before TIME',
+            )
+    parser.add_argument(
+            '--limit',
+            metavar='COUNT',
+            type=int,
+            help='max number of news to show',
+            )
+    parser.add_argument(
+            '--format',
+            choices=output_writers.FORMAT_LIST,
+            help='format of news: ``text`` (titles), ``jsonl`` or ``csv``. '
+                    'default is ``{}``'.format(output_writers.DEFAULT_FORMAT),
+            )
+    args = parser.parse_args()
+    
+    if args.format is not None:
+        format_name = args.format
+    else:
+        format_name = output_writers.DEFAULT_FORMAT
+    
+    try:
+        row_iter = sqlite_store.query_news(
+                args.db,
+                source_url=args.source,
+                domain=args.domain,
+                since=args.since,
+                until=args.until,
+                limit=args.limit,
+                )
+    except sqlite3.Error as e:
+        parser.error('can not read database {!r}: {}'.format(args.db, e))
+    
+    if format_name == output_writers.FORMAT_JSONL:
+        for row in row_iter:
+            sys.stdout.write('{}\n'.format(json.dumps(row, ensure_ascii=False)))
+    elif format_name == output_writers.FORMAT_CSV:
+        writer = csv.DictWriter(
+                sys.stdout, sqlite_store.QUERY_FIELD_LIST, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(row_iter)
+    else:
+        for row in row_iter:
+            if row['title'] is None:
+                continue
+            
+            sys.stdout.write('{}\n'.format(row['title'].replace('\n', ' ... ')))
@@ -0,0 +1,199 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import threading, time, bisect, importlib
+from . import http_client, parse_stage
+
+PHASE_LIST = (
+        http_client.PHASE_DNS,
+        http_client.PHASE_CONNECT,
+        http_client.PHASE_TTFB,
+        http_client.PHASE_DOWNLOAD,
+        parse_stage.PHASE_PARSE,
+        )
+
+# upper bounds of histogram buckets, in seconds. the last bucket has
+#   no upper bound
+HISTOGRAM_BOUNDS = (
+        0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5,
+        1.0, 2.0, 5.0, 10.0, 30.0, 60.0,
+        )
+
+class Histogram:
+    def __init__(self, bounds=None):
+        if bounds is None:
+            bounds = HISTOGRAM_BOUNDS
+        
+        self._bounds = bounds
+        self._bucket_list = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+    
+    def add(self, value):
+        self._bucket_list[bisect.bisect_left(self._bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        
+        if self.min is None or value < self.min:
+            self.min = value
+        
+        if self.max is None or value > self.max:
+            self.max = value
+    
+    # upper bound of the bucket with ``part`` of values
+    def quantile(self, part):
+        if not self.count:
+            return None
+        
+        rank = part * self.count
+        seen = 0
+        
+        for bound, bucket in zip(self._bounds, self._bucket_list):
+            seen += bucket
+            
+            if seen >= rank:
+                return min(bound, self.max)
+        
+        return self.max
+    
+    def summary(self):
+        return {
+                'count': self.count,
+                'sum': self.sum,
+                'min': self.min,
+                'max': self.max,
+                'mean': self.sum / self.count if self.count else None,
+                'p50': self.quantile(0.5),
+                'p90': self.quantile(0.9),
+                'p99': self.quantile(0.99),
+                'buckets': [
+                        [bound, bucket]
+                        for bound, bucket in zip(
+                                self._bounds + (None,), self._bucket_list)
+                        if bucket
+                        ],
+                }
+
+# run-level aggregates of fetched urls. ``hook`` is optional object with
+#   methods ``on_record(data)`` (called for every url) and
+#   ``on_summary(summary)`` (called by ``finish()``), any of them may
+#   be missed
+class RunMetrics:
+    def __init__(self, hook=None):
+        self._hook_on_record = getattr(hook, 'on_record', None)
+        self._hook_on_summary = getattr(hook, 'on_summary', None)
+        self._lock = threading.Lock()
+        self._begin_time = time.time()
+        self._phase_map = {phase: Histogram() for phase in PHASE_LIST}
+        self._transfer_hist = Histogram()
+        self._error_kind_map = {}
+        self._error_class_map = {}
+        self.pages = 0
+        self.cached_pages = 0
+        self.errors = 0
+        self.items = 0
+        self.wire_bytes = 0
+    
+    # threadsafe function
+    def add(self, data):
+        with self._lock:
+            for phase, value in getattr(data, 'timings', {}).items():
+                hist = self._phase_map.get(phase)
+                
+                if hist is not None:
+                    hist.add(value)
+            
+            if getattr(data, 'transfer_time', None) is not None:
+                self._transfer_hist.add(data.transfer_time)
+            
+            if getattr(data, 'wire_size', None) is not None:
+                self.wire_bytes += data.wire_size
+            
+            if data.error is not None:
+                self.errors += 1
+                
+                error_class = data.error[0].__name__
+                self._error_kind_map[data.error_kind] = \
+                        self._error_kind_map.get(data.error_kind, 0) + 1
+                self._error_class_map[error_class] = \
+                        self._error_class_map.get(error_class, 0) + 1
+            else:
+                self.pages += 1
+                self.items += len(data.result)
+                
+                if data.cached:
+                    self.cached_pages += 1
+        
+        if self._hook_on_record is not None:
+            self._hook_on_record(data)
+    
+    def summary(self):
+        with self._lock:
+            return {
+                    'begin_time': self._begin_time,
+                    'elapsed': time.time() - self._begin_time,
+                    'pages': self.pages,
+                    'cached_pages': self.cached_pages,
+                    'errors': self.errors,
+                    'items': self.items,
+                    'wire_bytes': self.wire_bytes,
+                    'errors_by_kind': dict(self._error_kind_map),
+                    'errors_by_class': dict(self._error_class_map),
+                    'transfer_time': self._transfer_hist.summary(),
+                    'phases': {
+                            phase: hist.summary()
+                            for phase, hist in self._phase_map.items()
+                            },
+                    }
+    
+    def finish(self):
+        summary = self.summary()
+        
+        if self._hook_on_summary is not None:
+            self._hook_on_summary(summary)
+        
+        return summary
+
+# loads hook object by ``MODULE:NAME`` spec
+def load_hook(spec):
+    module_name, sep, name = spec.partition(':')
+    
+    if not sep or not module_name or not name:
+        raise ValueError('invalid metrics hook: {!r}'.format(spec))
+    
+    hook = importlib.import_module(module_name)
+    
+    for attr in name.split('.'):
+        hook = getattr(hook, attr)
+    
+    return hook
+
+def wrap_on_result(metrics, on_result):
+    if metrics is None:
+        return on_result
+    
+    def metrics_on_result(data):
+        metrics.add(data)
+        
+        if on_result is not None:
+            return on_result(data)
+    
+    return metrics_on_result
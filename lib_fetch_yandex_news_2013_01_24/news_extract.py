@@ -0,0 +1,170 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+from html import parser as html_parser
+
+# extraction spec: ``item`` -- tag name and ``in_attrs`` of news item
+#   element. ``fields`` -- for every field: tag name and ``in_attrs``
+#   of the first matching element inside the item (``None`` tag means
+#   the item element itself), and attribute name to take (``None``
+#   means the text which is the first child of the element)
+
+YANDEX_NEWS_SPEC = {
+        'item': ('dl', {'class': 'b-news-item'}),
+        'fields': {
+                'title': ('a', {'class': 'title'}, None),
+                'raw_url': ('a', {'class': 'title'}, 'href'),
+                'text': ('dd', {'class': 'text'}, None),
+                },
+        }
+
+GOOGLE_NEWS_SPEC = {
+        'item': ('a', {'class': 'article'}),
+        'fields': {
+                'raw_url': (None, None, 'href'),
+                'title': ('span', {'class': 'titletext'}, None),
+                },
+        }
+
+def match_attrs(attrs, in_attrs):
+    if not in_attrs:
+        return True
+    
+    for name, value in in_attrs.items():
+        attr_value = attrs.get(name)
+        
+        if attr_value is None or value not in attr_value:
+            return False
+    
+    return True
+
+# single-pass extractor: looks at parser events and keeps only
+#   fields of the current item, the document tree is never built
+class NewsExtractor(html_parser.HTMLParser):
+    def __init__(self, spec):
+        super().__init__(convert_charrefs=True)
+        
+        self._item_tag, self._item_attrs = spec['item']
+        self._field_list = tuple(
+                (name, tag, in_attrs, attr)
+                for name, (tag, in_attrs, attr) in spec['fields'].items()
+                )
+        
+        self.item_list = []
+        self._item = None
+        self._item_depth = 0
+        self._text_name_list = None
+        self._text_list = None
+    
+    def _end_text(self):
+        if self._text_name_list is None:
+            return
+        
+        if self._text_list:
+            text = ''.join(self._text_list)
+        else:
+            # the first child is not a text
+            text = None
+        
+        for name in self._text_name_list:
+            self._item[name] = text
+        
+        self._text_name_list = None
+        self._text_list = None
+    
+    def _begin_fields(self, tag, attrs, is_item):
+        text_name_list = []
+        
+        for name, field_tag, in_attrs, attr in self._field_list:
+            if name in self._item:
+                continue
+            
+            if field_tag is None:
+                if not is_item:
+                    continue
+            elif field_tag != tag or not match_attrs(attrs, in_attrs):
+                continue
+            
+            if attr is not None:
+                self._item[name] = attrs.get(attr) or ''
+            else:
+                text_name_list.append(name)
+        
+        if text_name_list:
+            self._text_name_list = text_name_list
+            self._text_list = []
+    
+    def _end_item(self):
+        self._end_text()
+        
+        self.item_list.append({
+                name: value for name, value in self._item.items()
+                if value is not None
+                })
+        self._item = None
+    
+    def handle_starttag(self, tag, attrs):
+        self._end_text()
+        
+        if self._item is None:
+            if tag != self._item_tag:
+                return
+            
+            attrs = dict(attrs)
+            
+            if not match_attrs(attrs, self._item_attrs):
+                return
+            
+            self._item = {}
+            self._item_depth = 1
+            self._begin_fields(tag, attrs, True)
+            return
+        
+        if tag == self._item_tag:
+            self._item_depth += 1
+        
+        self._begin_fields(tag, dict(attrs), False)
+    
+    def handle_endtag(self, tag):
+        self._end_text()
+        
+        if self._item is None or tag != self._item_tag:
+            return
+        
+        self._item_depth -= 1
+        
+        if not self._item_depth:
+            self._end_item()
+    
+    def handle_data(self, data):
+        if self._text_list is not None:
+            self._text_list.append(data)
+    
+    def close(self):
+        super().close()
+        
+        if self._item is not None:
+            self._end_item()
+
+def extract_news(content, spec):
+    extractor = NewsExtractor(spec)
+    extractor.feed(content)
+    extractor.close()
+    
+    return extractor.item_list
@@ -0,0 +1,107 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+FIELD_LIST = ('title', 'raw_url', 'url', 'text')
+FIELD_SET = frozenset(FIELD_LIST)
+
+# one news item. fields are attributes (``None`` if there is no such
+#   field). for code written for items which were ``dict``, read access
+#   like ``item['title']``, ``item.get('text')`` and ``'text' in item``
+#   works too -- ``None`` fields are missing keys
+class NewsItem:
+    __slots__ = FIELD_LIST
+    
+    def __init__(self, title=None, raw_url=None, url=None, text=None):
+        self.title = title
+        self.raw_url = raw_url
+        self.url = url
+        self.text = text
+    
+    def __repr__(self):
+        return 'NewsItem({})'.format(', '.join(
+                '{}={!r}'.format(name, value) for name, value in self.items()))
+    
+    def __eq__(self, other):
+        if not isinstance(other, NewsItem):
+            return NotImplemented
+        
+        return self.title == other.title and \
+                self.raw_url == other.raw_url and \
+                self.url == other.url and \
+                self.text == other.text
+    
+    def __getitem__(self, key):
+        if key not in FIELD_SET:
+            raise KeyError(key)
+        
+        value = getattr(self, key)
+        
+        if value is None:
+            raise KeyError(key)
+        
+        return value
+    
+    def __setitem__(self, key, value):
+        if key not in FIELD_SET:
+            raise KeyError(key)
+        
+        setattr(self, key, value)
+    
+    def __contains__(self, key):
+        return key in FIELD_SET and getattr(self, key) is not None
+    
+    def __iter__(self):
+        return iter(self.keys())
+    
+    def __len__(self):
+        return len(self.keys())
+    
+    def get(self, key, default=None):
+        if key not in FIELD_SET:
+            return default
+        
+        value = getattr(self, key)
+        
+        if value is None:
+            return default
+        
+        return value
+    
+    def keys(self):
+        return tuple(name for name in FIELD_LIST
+                if getattr(self, name) is not None)
+    
+    def items(self):
+        return tuple((name, getattr(self, name)) for name in FIELD_LIST
+                if getattr(self, name) is not None)
+
+def to_dict(item):
+    return dict(item.items())
+
+def from_dict(item_obj):
+    return NewsItem(**{
+            name: value for name, value in item_obj.items()
+            if name in FIELD_SET})
+
+# items of third-party services may be ``dict``. they are turned into
+#   ``NewsItem`` once, so consumers read attributes and not ``.get()``
+def to_items(result):
+    return tuple(
+            item if isinstance(item, NewsItem) else from_dict(item)
+            for item in result)
@@ -0,0 +1,222 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import os, io, threading, time, queue, json, csv
+from . import fetch_news
+
+FORMAT_TEXT = 'text'
+FORMAT_JSONL = 'jsonl'
+FORMAT_CSV = 'csv'
+FORMAT_LIST = (FORMAT_TEXT, FORMAT_JSONL, FORMAT_CSV)
+DEFAULT_FORMAT = FORMAT_TEXT
+
+DEFAULT_FLUSH_INTERVAL = 1.0 # seconds
+
+FIELD_LIST = ('url_id', 'source_url', 'title', 'url', 'raw_url', 'text')
+
+def iter_records(data):
+    for result in data.result:
+        yield {
+                'url_id': data.url_id,
+                'source_url': data.url,
+                'title': result.title,
+                'url': result.url,
+                'raw_url': result.raw_url,
+                'text': result.text,
+                }
+
+class TextFormatter:
+    def __init__(self, show_url=None, url_separator=None):
+        self._show_url = show_url
+        self._url_separator = url_separator
+    
+    def format(self, data):
+        return ''.join(
+                '{}\n'.format(result_line)
+                for result_line in fetch_news.result_line_format(
+                        data,
+                        show_url=self._show_url,
+                        url_separator=self._url_separator,
+                        )
+                )
+
+class JsonlFormatter:
+    def format(self, data):
+        return ''.join(
+                '{}\n'.format(json.dumps(record, ensure_ascii=False))
+                for record in iter_records(data)
+                )
+
+class CsvFormatter:
+    def __init__(self, write_header=None):
+        if write_header is None:
+            write_header = True
+        
+        self._write_header = write_header
+    
+    def format(self, data):
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, FIELD_LIST, lineterminator='\n')
+        
+        if self._write_header:
+            writer.writeheader()
+            self._write_header = False
+        
+        writer.writerows(iter_records(data))
+        
+        return buf.getvalue()
+
+def create_formatter(format_name, show_url=None, url_separator=None,
+        write_header=None):
+    if format_name == FORMAT_TEXT:
+        return TextFormatter(show_url=show_url, url_separator=url_separator)
+    
+    if format_name == FORMAT_JSONL:
+        return JsonlFormatter()
+    
+    if format_name == FORMAT_CSV:
+        return CsvFormatter(write_header=write_header)
+    
+    raise ValueError('unknown output format: {!r}'.format(format_name))
+
+# formats and writes results in its own thread. file is flushed (and
+#   synced if ``fsync``) not more often than every ``flush_interval``
+#   seconds, so callers of ``write()`` never wait for the disk.
+#   ``on_flush(offset, data_list)`` is called after every flush with
+#   file offset and results which are written before it. error of
+#   writing stops the writer, it is raised by ``write()`` and
+#   ``close()``
+class OutputWriter:
+    def __init__(self, fd, formatter, flush_interval=None, fsync=None,
+            on_flush=None):
+        if flush_interval is None:
+            flush_interval = DEFAULT_FLUSH_INTERVAL
+        
+        if fsync is None:
+            fsync = False
+        
+        self._fd = fd
+        self._formatter = formatter
+        self._flush_interval = flush_interval
+        self._fsync = fsync
+        self._on_flush = on_flush
+        self._flushed_data = []
+        self._queue = queue.Queue()
+        self._close_mark = object()
+        self._error = None
+        self._thread = threading.Thread(target=self._thread_target)
+        self._thread.start()
+    
+    def _flush(self):
+        self._fd.flush()
+        
+        if self._fsync:
+            os.fsync(self._fd.fileno())
+        
+        if self._on_flush is not None:
+            data_list = self._flushed_data
+            self._flushed_data = []
+            
+            self._on_flush(self._fd.tell(), data_list)
+    
+    # writes batch of results. returns ``True`` if close mark is met
+    def _write_batch(self, batch):
+        closed = False
+        chunk_list = []
+        
+        for data in batch:
+            if data is self._close_mark:
+                closed = True
+                continue
+            
+            chunk_list.append(self._formatter.format(data))
+            
+            if self._on_flush is not None:
+                self._flushed_data.append(data)
+        
+        if chunk_list:
+            self._fd.write(''.join(chunk_list))
+        
+        return closed
+    
+    def _thread_target(self):
+        try:
+            self._write_loop()
+        except Exception as e:
+            self._error = e
+            
+            raise
+    
+    def _write_loop(self):
+        flush_time = time.monotonic() + self._flush_interval
+        dirty = False
+        
+        while True:
+            # with nothing to flush there is nothing to wake up for
+            if dirty:
+                timeout = max(0.0, flush_time - time.monotonic())
+            else:
+                timeout = None
+            
+            try:
+                data = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                data = None
+            
+            batch = []
+            
+            while data is not None:
+                batch.append(data)
+                
+                try:
+                    data = self._queue.get_nowait()
+                except queue.Empty:
+                    data = None
+            
+            if batch:
+                closed = self._write_batch(batch)
+                dirty = True
+            else:
+                closed = False
+            
+            if closed or time.monotonic() >= flush_time:
+                if dirty:
+                    self._flush()
+                    dirty = False
+                
+                flush_time = time.monotonic() + self._flush_interval
+            
+            if closed:
+                return
+    
+    # threadsafe function. raises error of writing thread, so results
+    #   are not buffered in memory when they can not be written
+    def write(self, data):
+        if self._error is not None:
+            raise self._error
+        
+        self._queue.put(data)
+    
+    # writes all queued results and waits for the end of writing
+    def close(self):
+        self._queue.put(self._close_mark)
+        self._thread.join()
+        
+        if self._error is not None:
+            raise self._error
@@ -0,0 +1,142 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import sys, threading, time, queue, asyncio
+from concurrent import futures
+from . import retry, news_item
+
+PHASE_PARSE = 'parse'
+
+# runs in parsing process too, so the time does not include waiting
+#   for free process
+def timed_parse(parse_content, url, content):
+    begin_time = time.monotonic()
+    result = parse_content(url, content)
+    
+    return result, time.monotonic() - begin_time
+
+# parses downloaded pages. without ``procs`` pages are parsed right in
+#   the calling thread, otherwise -- in separate processes, so parsing
+#   is not limited by GIL and does not hold network workers. results of
+#   the processes are delivered to ``on_result`` by own thread: slow
+#   consumer must not hold the thread of the process pool
+class ParseStage:
+    def __init__(self, procs=None, max_pending=None, cache=None):
+        self._cache = cache
+        
+        if procs is None:
+            self._executor = None
+            self._pending_sem = None
+            return
+        
+        if max_pending is None:
+            max_pending = procs * 2
+        
+        self._executor = futures.ProcessPoolExecutor(max_workers=procs)
+        self._pending_sem = threading.BoundedSemaphore(max_pending)
+        self._delivery_queue = queue.Queue()
+        self._delivery_thread = threading.Thread(target=self._deliver_loop)
+        self._delivery_thread.start()
+    
+    def _set_result(self, data, resp, timed_result):
+        result, data.timings[PHASE_PARSE] = timed_result
+        data.result = news_item.to_items(result)
+        
+        if self._cache is not None:
+            try:
+                self._cache.put(data.url, resp.headers, data.result)
+            except (EnvironmentError, ValueError, TypeError):
+                # the page is parsed well. it is just not cached
+                pass
+    
+    def _deliver_loop(self):
+        while True:
+            entry = self._delivery_queue.get()
+            
+            if entry is None:
+                return
+            
+            data, resp, future, on_result = entry
+            
+            try:
+                try:
+                    timed_result = future.result()
+                except Exception:
+                    data.error = sys.exc_info()
+                    data.error_kind = retry.ERROR_PARSE
+                else:
+                    self._set_result(data, resp, timed_result)
+                
+                if on_result is not None:
+                    on_result(data)
+            except Exception:
+                # error of consumer must not stop delivery of other pages
+                sys.excepthook(*sys.exc_info())
+            finally:
+                self._pending_sem.release()
+    
+    # threadsafe function
+    def parse(self, data, resp, parse_content, on_result=None):
+        if self._executor is None:
+            try:
+                self._set_result(data, resp, timed_parse(
+                        parse_content, data.url, resp.body))
+            except Exception:
+                data.error = sys.exc_info()
+                data.error_kind = retry.ERROR_PARSE
+            
+            if on_result is not None:
+                on_result(data)
+            
+            return
+        
+        # blocks the fetcher if parsing processes are too far behind
+        self._pending_sem.acquire()
+        
+        # runs in the thread of the process pool. place of the page in
+        #   ``max_pending`` is freed after its delivery, so results do not
+        #   pile up in memory before slow consumer
+        def done_callback(future):
+            self._delivery_queue.put((data, resp, future, on_result))
+        
+        try:
+            future = self._executor.submit(
+                    timed_parse, parse_content, data.url, resp.body)
+        except:
+            self._pending_sem.release()
+            raise
+        
+        future.add_done_callback(done_callback)
+    
+    async def parse_async(self, data, resp, parse_content):
+        if self._executor is None:
+            timed_result = timed_parse(parse_content, data.url, resp.body)
+        else:
+            timed_result = await asyncio.get_running_loop().run_in_executor(
+                    self._executor,
+                    timed_parse, parse_content, data.url, resp.body)
+        
+        self._set_result(data, resp, timed_result)
+    
+    # waits for all submitted pages
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._delivery_queue.put(None)
+            self._delivery_thread.join()
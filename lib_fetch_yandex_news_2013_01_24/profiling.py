@@ -0,0 +1,102 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import os.path, sys, threading, cProfile, pstats
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# time of a part of work is cumulative time of its functions. for
+#   coroutines only the time they run is counted, not the time they wait.
+#   pages parsed in separate processes (``--parse-procs``) are not seen
+CATEGORY_LIST = (
+        ('fetch', (
+                ('http_client.py', 'get'),
+                ('fetch_news_async.py', 'get'),
+                )),
+        ('parse', (
+                ('parse_stage.py', 'timed_parse'),
+                )),
+        ('output', (
+                ('output_writers.py', '_write_batch'),
+                ('output_writers.py', '_flush'),
+                ('sqlite_store.py', '_write_batch'),
+                )),
+        )
+
+# profiles all threads started between ``start()`` and ``stop()`` (and
+#   the calling thread), every thread by its own ``cProfile.Profile``
+class ThreadProfiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profile_list = []
+    
+    def _add_profile(self):
+        profile = cProfile.Profile()
+        
+        try:
+            profile.enable()
+        except ValueError:
+            # since Python 3.12 profiler is the same for all threads,
+            #   the one enabled by ``start()`` already sees this thread
+            return
+        
+        with self._lock:
+            self._profile_list.append(profile)
+    
+    def _thread_bootstrap(self, frame, event, arg):
+        sys.setprofile(None)
+        self._add_profile()
+    
+    def start(self):
+        threading.setprofile(self._thread_bootstrap)
+        self._add_profile()
+    
+    # must be called after profiled threads are finished. returns
+    #   merged ``pstats.Stats``
+    def stop(self):
+        threading.setprofile(None)
+        
+        with self._lock:
+            profile_list = tuple(self._profile_list)
+            self._profile_list = []
+        
+        for profile in profile_list:
+            profile.disable()
+        
+        return pstats.Stats(*profile_list)
+
+# returns seconds spent in every category of ``CATEGORY_LIST``
+def attribute(stats):
+    category_map = {}
+    
+    for category, func_list in CATEGORY_LIST:
+        for file_name, func_name in func_list:
+            category_map[
+                    os.path.join(PACKAGE_DIR, file_name), func_name] = category
+    
+    time_map = {category: 0.0 for category, func_list in CATEGORY_LIST}
+    
+    for (path, line, func_name), func_stat in stats.stats.items():
+        category = category_map.get((path, func_name))
+        
+        if category is not None:
+            cc, nc, tt, ct, callers = func_stat
+            time_map[category] += ct
+    
+    return time_map
@@ -0,0 +1,101 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import sys, socket, random
+
+ERROR_TRANSIENT = 'transient'
+ERROR_PERMANENT = 'permanent'
+ERROR_PARSE = 'parse'
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BASE_DELAY = 1.0 # seconds
+DEFAULT_MAX_DELAY = 30.0 # seconds
+MAX_BACKOFF_EXP = 64
+
+TRANSIENT_STATUS_LIST = (408, 429)
+
+TRANSIENT_ERROR_TYPES = (
+        TimeoutError,
+        socket.timeout,
+        socket.gaierror,
+        ConnectionError,
+        EOFError,
+        )
+
+# errors of ``asyncio`` and ``http.client``. these modules are not
+#   imported here: if they are not imported by anyone, their errors
+#   can not happen
+def get_module_error_types():
+    error_type_list = []
+    
+    asyncio = sys.modules.get('asyncio')
+    
+    if asyncio is not None:
+        error_type_list.append(asyncio.TimeoutError)
+    
+    http_client = sys.modules.get('http.client')
+    
+    if http_client is not None:
+        error_type_list.append(http_client.HTTPException)
+    
+    return tuple(error_type_list)
+
+# fetch errors only. errors from parsing are ``ERROR_PARSE``
+def classify_error(error):
+    status = getattr(error, 'status', None)
+    
+    if status is not None:
+        if status >= 500 or status in TRANSIENT_STATUS_LIST:
+            return ERROR_TRANSIENT
+        
+        return ERROR_PERMANENT
+    
+    if isinstance(error, TRANSIENT_ERROR_TYPES) or \
+            isinstance(error, get_module_error_types()):
+        return ERROR_TRANSIENT
+    
+    return ERROR_PERMANENT
+
+class RetryPolicy:
+    def __init__(self, max_attempts=None, base_delay=None, max_delay=None):
+        if max_attempts is None:
+            max_attempts = DEFAULT_MAX_ATTEMPTS
+        
+        if base_delay is None:
+            base_delay = DEFAULT_BASE_DELAY
+        
+        if max_delay is None:
+            max_delay = DEFAULT_MAX_DELAY
+        
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+    
+    def should_retry(self, error_kind, attempt):
+        return error_kind == ERROR_TRANSIENT and attempt < self.max_attempts
+    
+    # exponential backoff with full jitter, so retries of many urls
+    #   failed at the same moment do not come back at the same moment.
+    #   the exponent is capped: ``2.0 ** attempt`` overflows for big
+    #   ``max_attempts``
+    def get_delay(self, attempt):
+        return random.uniform(0.0, min(
+                self.max_delay,
+                self.base_delay * 2.0 ** min(attempt - 1, MAX_BACKOFF_EXP),
+                ))
@@ -0,0 +1,124 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import os, threading, time, struct, tempfile
+from . import dedup
+
+DEFAULT_TTL = 30 * 24 * 60 * 60 # seconds
+
+# item key and the last time when the item was seen
+RECORD_STRUCT = struct.Struct('<{}sI'.format(dedup.KEY_DIGEST_SIZE))
+
+# umask can be read only by setting it, so it is read once, when the
+#   module is imported and other threads do not make files yet
+def get_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    
+    return umask
+
+DEFAULT_FILE_MODE = 0o666 & ~get_umask()
+
+# mode of existing file, or default mode (by umask) of new one
+def get_file_mode(path):
+    try:
+        return os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        return DEFAULT_FILE_MODE
+
+# persistent set of seen news items. on disk every item takes
+#   ``RECORD_STRUCT.size`` bytes, items not seen for ``ttl`` are
+#   forgotten
+class SeenStore:
+    def __init__(self, path, ttl=None):
+        if ttl is None:
+            ttl = DEFAULT_TTL
+        
+        self._path = path
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._seen_map = {}
+        
+        self._load()
+    
+    def _load(self):
+        try:
+            with open(self._path, 'rb') as fd:
+                content = fd.read()
+        except FileNotFoundError:
+            return
+        
+        min_time = time.time() - self._ttl
+        content_size = len(content) - len(content) % RECORD_STRUCT.size
+        
+        for key, seen_time in RECORD_STRUCT.iter_unpack(content[:content_size]):
+            if seen_time >= min_time:
+                self._seen_map[key] = seen_time
+    
+    def __len__(self):
+        return len(self._seen_map)
+    
+    # threadsafe function. returns items which were not seen before
+    def filter(self, result):
+        now = int(time.time())
+        new_list = []
+        
+        with self._lock:
+            for item in result:
+                key = dedup.get_item_key(item)
+                
+                if key not in self._seen_map:
+                    new_list.append(item)
+                
+                self._seen_map[key] = now
+        
+        return tuple(new_list)
+    
+    def save(self):
+        min_time = time.time() - self._ttl
+        
+        with self._lock:
+            for key, seen_time in tuple(self._seen_map.items()):
+                if seen_time < min_time:
+                    del self._seen_map[key]
+            
+            content = b''.join(
+                    RECORD_STRUCT.pack(key, seen_time)
+                    for key, seen_time in self._seen_map.items()
+                    )
+        
+        tmp_fd, tmp_path = tempfile.mkstemp(
+                suffix='.tmp',
+                dir=os.path.dirname(os.path.abspath(self._path)),
+                )
+        try:
+            with open(tmp_fd, 'wb') as fd:
+                fd.write(content)
+            
+            # ``mkstemp()`` makes file readable only by its owner
+            os.chmod(tmp_path, get_file_mode(self._path))
+            os.replace(tmp_path, self._path)
+        except:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                # interrupted after ``os.replace()``, the file is saved
+                pass
+            
+            raise
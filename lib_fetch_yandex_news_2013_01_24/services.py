@@ -0,0 +1,87 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import re
+from urllib import parse as url_parse
+
+class ServiceError(Exception):
+    pass
+
+# news service description. ``parse_content(url, content)`` must be
+#   module-level function, so it can be sent to parsing processes.
+#   ``timeout``, ``content_length`` and ``headers`` -- per-service
+#   fetch settings (``None`` means default ones)
+class Service:
+    def __init__(self, name, hosts, parse_content, error_class,
+            url_pattern=None, fix_url=None,
+            timeout=None, content_length=None, headers=None):
+        self.name = name
+        self.hosts = tuple(host.lower() for host in hosts)
+        self.parse_content = parse_content
+        self.error_class = error_class
+        self.fix_url = fix_url
+        self.timeout = timeout
+        self.content_length = content_length
+        self.headers = headers
+        
+        if url_pattern is not None:
+            self.url_re = re.compile(url_pattern, flags=re.M|re.S)
+        else:
+            self.url_re = None
+    
+    def match(self, url):
+        return self.url_re is None or self.url_re.match(url) is not None
+
+class ServiceRegistry:
+    def __init__(self):
+        self._host_map = {}
+        self._name_map = {}
+    
+    def register(self, service):
+        if service.name in self._name_map:
+            raise ServiceError(
+                    'service already registered: {!r}'.format(service.name))
+        
+        self._name_map[service.name] = service
+        
+        for host in service.hosts:
+            self._host_map.setdefault(host, []).append(service)
+    
+    def get(self, name):
+        return self._name_map.get(name)
+    
+    def find(self, url):
+        try:
+            host = url_parse.urlsplit(url).hostname
+        except ValueError:
+            return None
+        
+        for service in self._host_map.get(host, ()):
+            if service.match(url):
+                return service
+        
+        return None
+
+registry = ServiceRegistry()
+
+def register_service(service):
+    registry.register(service)
+
+def find_service(url):
+    return registry.find(url)
@@ -0,0 +1,225 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import threading, time, queue, sqlite3
+from urllib import parse as url_parse
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS news (
+    id INTEGER PRIMARY KEY,
+    url TEXT UNIQUE,
+    raw_url TEXT,
+    title TEXT,
+    text TEXT,
+    domain TEXT,
+    source_url TEXT NOT NULL,
+    first_fetch_time REAL NOT NULL,
+    fetch_time REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS news_source_url ON news (source_url, fetch_time);
+CREATE INDEX IF NOT EXISTS news_domain ON news (domain, fetch_time);
+CREATE INDEX IF NOT EXISTS news_fetch_time ON news (fetch_time);
+'''
+
+UPSERT_SQL = '''
+INSERT INTO news (
+    url, raw_url, title, text, domain, source_url,
+    first_fetch_time, fetch_time
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (url) DO UPDATE SET
+    raw_url = excluded.raw_url,
+    title = excluded.title,
+    text = excluded.text,
+    source_url = excluded.source_url,
+    fetch_time = excluded.fetch_time
+'''
+
+QUERY_FIELD_LIST = (
+        'url', 'raw_url', 'title', 'text', 'domain', 'source_url',
+        'first_fetch_time', 'fetch_time',
+        )
+
+def get_domain(url):
+    if url is None:
+        return None
+    
+    try:
+        domain = url_parse.urlsplit(url).hostname
+    except ValueError:
+        return None
+    
+    if domain is not None and domain.startswith('www.'):
+        domain = domain[len('www.'):]
+    
+    return domain
+
+def open_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.executescript(SCHEMA)
+    
+    return conn
+
+# for reading only: file is not made and schema is not changed, so
+#   mistyped path is an error and not a new empty database
+def open_db_readonly(path):
+    return sqlite3.connect(
+            'file:{}?mode=ro'.format(url_parse.quote(path)), uri=True)
+
+def insert_result(conn, source_url, result, fetch_time):
+    conn.executemany(
+            UPSERT_SQL,
+            (
+                (
+                    item.url,
+                    item.raw_url,
+                    item.title,
+                    item.text,
+                    get_domain(item.url),
+                    source_url,
+                    fetch_time,
+                    fetch_time,
+                )
+                for item in result
+            ),
+            )
+
+# keeps fetched news in SQLite database. every batch of results is
+#   inserted in one transaction on the store's own thread. news with the
+#   same url are updated, not duplicated
+class SqliteStore:
+    def __init__(self, path):
+        self._path = path
+        self._queue = queue.Queue()
+        self._close_mark = object()
+        self._error = None
+        
+        # open in caller's thread to report a bad path early
+        open_db(path).close()
+        
+        self._thread = threading.Thread(target=self._thread_target)
+        self._thread.start()
+    
+    # inserts batch of results in one transaction. returns ``True``
+    #   if close mark is met
+    def _write_batch(self, conn, batch):
+        closed = False
+        
+        with conn:
+            for entry in batch:
+                if entry is self._close_mark:
+                    closed = True
+                    continue
+                
+                insert_result(conn, *entry)
+        
+        return closed
+    
+    def _thread_target(self):
+        conn = None
+        
+        try:
+            conn = open_db(self._path)
+            
+            while True:
+                batch = [self._queue.get()]
+                
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                
+                if self._write_batch(conn, batch):
+                    return
+        except Exception as e:
+            self._error = e
+            
+            raise
+        finally:
+            if conn is not None:
+                conn.close()
+    
+    # threadsafe function. raises error of writing thread, so results
+    #   are not buffered in memory when they can not be written
+    def write(self, data):
+        if self._error is not None:
+            raise self._error
+        
+        self._queue.put((data.url, data.result, time.time()))
+    
+    # writes all queued results and waits for the end of writing
+    def close(self):
+        self._queue.put(self._close_mark)
+        self._thread.join()
+        
+        if self._error is not None:
+            raise self._error
+
+# database is opened at once, so its error is raised by the call, not
+#   by the iteration
+def query_news(path, source_url=None, domain=None, since=None, until=None,
+        limit=None):
+    where_list = []
+    param_list = []
+    
+    if source_url is not None:
+        where_list.append('source_url = ?')
+        param_list.append(source_url)
+    
+    if domain is not None:
+        where_list.append('domain = ?')
+        param_list.append(domain)
+    
+    if since is not None:
+        where_list.append('fetch_time >= ?')
+        param_list.append(since)
+    
+    if until is not None:
+        where_list.append('fetch_time < ?')
+        param_list.append(until)
+    
+    sql = 'SELECT {} FROM news'.format(', '.join(QUERY_FIELD_LIST))
+    
+    if where_list:
+        sql += ' WHERE {}'.format(' AND '.join(where_list))
+    
+    sql += ' ORDER BY fetch_time DESC'
+    
+    if limit is not None:
+        sql += ' LIMIT ?'
+        param_list.append(limit)
+    
+    conn = open_db_readonly(path)
+    
+    try:
+        cursor = conn.execute(sql, param_list)
+    except:
+        conn.close()
+        raise
+    
+    return iter_rows(conn, cursor)
+
+def iter_rows(conn, cursor):
+    try:
+        for row in cursor:
+            yield dict(zip(QUERY_FIELD_LIST, row))
+    finally:
+        conn.close()
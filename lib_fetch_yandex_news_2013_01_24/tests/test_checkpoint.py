@@ -0,0 +1,94 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import os, json, tempfile, shutil, unittest
+from .. import fetch_news, news_item, dedup, checkpoint, output_writers
+
+def make_data(url_id, url_list):
+    data = fetch_news.Data()
+    data.url_id = url_id
+    data.url = 'http://news.yandex.ru/{}'.format(url_id)
+    data.result = tuple(
+            news_item.NewsItem(title=url, url=url) for url in url_list)
+    
+    return data
+
+# url 1 and url 2 repeat news of url before them
+def make_data_list():
+    return (
+            make_data(0, ('a', 'b')),
+            make_data(1, ('b', 'c')),
+            make_data(2, ('c', 'd')),
+            )
+
+class CheckpointTest(unittest.TestCase):
+    def setUp(self):
+        self.dir_path = tempfile.mkdtemp()
+        self.out_path = os.path.join(self.dir_path, 'out.jsonl')
+        self.journal_path = os.path.join(self.dir_path, 'out.checkpoint')
+    
+    def tearDown(self):
+        shutil.rmtree(self.dir_path)
+    
+    # runs like ``main_cli`` does with ``--dedup`` and ``--checkpoint``
+    #   or ``--resume``
+    def run_fetch(self, data_list, resume):
+        journal = checkpoint.CheckpointJournal(
+                self.journal_path, resume=resume)
+        
+        if resume:
+            checkpoint.truncate_output(self.out_path, journal.offset)
+        
+        dedup_index = dedup.DedupIndex()
+        journal.attach_dedup(dedup_index)
+        
+        with open(self.out_path, 'a', encoding='utf-8', newline='\n') as fd:
+            writer = output_writers.OutputWriter(
+                    fd,
+                    output_writers.JsonlFormatter(),
+                    on_flush=journal.record,
+                    )
+            
+            for data in data_list:
+                if data.url_id in journal.done_url_ids:
+                    continue
+                
+                data.result, data.dup_count = dedup_index.filter(data.result)
+                writer.write(data)
+            
+            writer.close()
+        
+        journal.close()
+    
+    def test_resume_with_dedup(self):
+        self.run_fetch(make_data_list()[:1], False)
+        
+        # killed run: unflushed result of url 1 without journal line
+        with open(self.out_path, 'a', encoding='utf-8') as fd:
+            fd.write('{"url_id": 1, "url": "c"')
+        
+        self.run_fetch(make_data_list(), True)
+        
+        with open(self.out_path, encoding='utf-8') as fd:
+            url_list = [json.loads(line)['url'] for line in fd]
+        
+        self.assertEqual(url_list, ['a', 'b', 'c', 'd'])
+
+if __name__ == '__main__':
+    unittest.main()
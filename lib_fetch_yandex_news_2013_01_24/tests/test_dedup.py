@@ -0,0 +1,89 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import unittest
+from .. import news_item, dedup
+
+def make_item(url, title=None):
+    return news_item.NewsItem(title=title, raw_url=url, url=url)
+
+class ItemKeyTest(unittest.TestCase):
+    def test_same_item(self):
+        self.assertEqual(
+                dedup.get_item_key(make_item('http://a/1', 'News')),
+                dedup.get_item_key(make_item('http://a/1', 'Other news')))
+        
+        # ``raw_url`` is used when there is no ``url``
+        self.assertEqual(
+                dedup.get_item_key(news_item.NewsItem(raw_url='http://a/1')),
+                dedup.get_item_key(make_item('http://a/1')))
+    
+    def test_use_title(self):
+        self.assertNotEqual(
+                dedup.get_item_key(
+                        make_item('http://a/1', 'News'), use_title=True),
+                dedup.get_item_key(
+                        make_item('http://a/1', 'Other news'), use_title=True))
+        
+        # case, punctuation and spaces of the title are ignored
+        self.assertEqual(
+                dedup.get_item_key(
+                        make_item('http://a/1', 'Big  News!'), use_title=True),
+                dedup.get_item_key(
+                        make_item('http://a/1', 'big news'), use_title=True))
+    
+    def test_no_collisions(self):
+        url_list = ['http://a/news/{}'.format(i) for i in range(20000)]
+        key_set = {dedup.get_item_key(make_item(url)) for url in url_list}
+        
+        self.assertEqual(len(key_set), len(url_list))
+        
+        for key in key_set:
+            self.assertEqual(len(key), dedup.KEY_DIGEST_SIZE)
+
+class DedupIndexTest(unittest.TestCase):
+    def test_filter(self):
+        index = dedup.DedupIndex()
+        a, b = make_item('http://a/1'), make_item('http://a/2')
+        
+        self.assertEqual(index.filter((a, b, a)), ((a, b), 1))
+        self.assertEqual(index.filter((b,)), ((), 1))
+        self.assertEqual(index.dup_count, 2)
+    
+    def test_lru_eviction(self):
+        index = dedup.DedupIndex(max_size=2)
+        a, b, c = (make_item('http://a/{}'.format(i)) for i in range(3))
+        
+        index.filter((a, b))
+        
+        # seeing ``a`` again makes ``b`` the least recently seen
+        self.assertEqual(index.filter((a,)), ((), 1))
+        self.assertEqual(index.filter((c,)), ((c,), 0))
+        
+        # ``b`` is forgotten, ``a`` and ``c`` are not
+        self.assertEqual(index.filter((a, c)), ((), 2))
+        self.assertEqual(index.filter((b,)), ((b,), 0))
+    
+    def test_add_keys(self):
+        index = dedup.DedupIndex(max_size=2)
+        a, b, c = (make_item('http://a/{}'.format(i)) for i in range(3))
+        
+        index.add_keys(map(index.get_key, (a, b, c)))
+        
+        self.assertEqual(index.filter((a, b, c)), ((a,), 2))
@@ -0,0 +1,134 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import asyncio, threading, unittest
+from .. import fetch_news_async
+
+# serves ``304 Not Modified`` without ``Content-Length`` on keep-alive
+#   connection, like real servers do for conditional requests
+async def handle_not_modified(reader, writer):
+    try:
+        while True:
+            await reader.readuntil(b'\r\n\r\n')
+            writer.write(
+                    b'HTTP/1.1 304 Not Modified\r\n'
+                    b'ETag: "1"\r\n'
+                    b'\r\n')
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+class AsyncHttpClientTest(unittest.TestCase):
+    def test_not_modified_has_no_body(self):
+        async def run():
+            handler_task_list = []
+            
+            def on_connect(reader, writer):
+                handler_task_list.append(asyncio.ensure_future(
+                        handle_not_modified(reader, writer)))
+            
+            server = await asyncio.start_server(
+                    on_connect, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            client = fetch_news_async.AsyncHttpClient()
+            
+            try:
+                resp_list = []
+                
+                for i in range(2):
+                    resp_list.append(await asyncio.wait_for(
+                            client.get(
+                                    'http://127.0.0.1:{}/'.format(port),
+                                    headers={'If-None-Match': '"1"'},
+                                    ),
+                            1.0,
+                            ))
+                
+                return resp_list
+            finally:
+                client.close()
+                
+                # handlers see the closed connection and finish, so they
+                #   are not cancelled at the end of ``asyncio.run()``
+                await asyncio.wait_for(
+                        asyncio.gather(*handler_task_list), 1.0)
+                
+                server.close()
+                await server.wait_closed()
+        
+        for resp in asyncio.run(run()):
+            self.assertEqual(resp.status, 304)
+            self.assertEqual(resp.body, b'')
+
+class FetchNewsAsyncTest(unittest.TestCase):
+    def test_callback_error_does_not_stop_run(self):
+        url_list = tuple(
+                'http://unknown.invalid/{}'.format(i) for i in range(3))
+        result_list = []
+        done_event = threading.Event()
+        
+        def on_begin(data):
+            raise RuntimeError('on_begin')
+        
+        def on_result(data):
+            result_list.append(data.url)
+            
+            raise RuntimeError('on_result')
+        
+        with self.assertLogs('asyncio', level='ERROR') as log_ctx:
+            fetch_news_async.fetch_news_async(
+                    url_list=url_list,
+                    on_begin=on_begin,
+                    on_result=on_result,
+                    on_done=done_event.set,
+                    )
+            
+            self.assertTrue(done_event.wait(10.0))
+        
+        self.assertEqual(sorted(result_list), sorted(url_list))
+        self.assertEqual(len(log_ctx.records), 6)
+    
+    def test_aiter_news_close_stops_workers(self):
+        url_list = tuple(
+                'http://unknown.invalid/{}'.format(i) for i in range(1000))
+        
+        async def run():
+            news_iter = fetch_news_async.aiter_news(
+                    url_list=url_list, queue_size=1)
+            url_count = 0
+            
+            async for data in news_iter:
+                url_count += 1
+                
+                if url_count == 5:
+                    break
+            
+            await news_iter.aclose()
+            
+            return [
+                    task for task in asyncio.all_tasks()
+                    if task.get_coro().__name__ == 'fetch_news_worker'
+                    ]
+        
+        self.assertEqual(asyncio.run(asyncio.wait_for(run(), 10.0)), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import unittest
+from unittest import mock
+from .. import host_sched
+
+def get_url_iter(url_list):
+    return iter(enumerate(url_list))
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+    
+    def __call__(self):
+        return self.now
+
+class HostSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(host_sched.time, 'monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def poll_url(self, sched):
+        item, delay = sched.poll()
+        
+        if item is None:
+            return None, delay
+        
+        return item[1], delay
+    
+    def test_parse_host_limit(self):
+        limit = host_sched.parse_host_limit('2.5:3')
+        
+        self.assertEqual((limit.rate, limit.max_conn), (2.5, 3))
+        
+        limit = host_sched.parse_host_limit(':4')
+        
+        self.assertEqual((limit.rate, limit.max_conn), (None, 4))
+        
+        for spec in ('0', '-1:2', '1:0'):
+            with self.assertRaises(ValueError):
+                host_sched.parse_host_limit(spec)
+    
+    def test_max_conn(self):
+        sched = host_sched.HostScheduler(
+                get_url_iter((
+                        'http://a/1', 'http://a/2', 'http://a/3', 'http://b/1',
+                        )),
+                default_limit=host_sched.HostLimit(max_conn=2),
+                )
+        
+        # hosts are interleaved
+        self.assertEqual(self.poll_url(sched), ('http://a/1', None))
+        self.assertEqual(self.poll_url(sched), ('http://b/1', None))
+        self.assertEqual(self.poll_url(sched), ('http://a/2', None))
+        
+        # ``http://a/`` has ``max_conn`` requests in flight
+        self.assertEqual(self.poll_url(sched), (None, None))
+        
+        sched.release('http://b/1')
+        
+        self.assertEqual(self.poll_url(sched), (None, None))
+        
+        sched.release('http://a/1')
+        
+        self.assertEqual(self.poll_url(sched), ('http://a/3', None))
+        
+        sched.release('http://a/2')
+        sched.release('http://a/3')
+        
+        self.assertTrue(sched.finished)
+    
+    def test_rate(self):
+        sched = host_sched.HostScheduler(
+                get_url_iter(('http://a/1', 'http://a/2', 'http://b/1')),
+                host_limits={'A': host_sched.HostLimit(rate=2.0)},
+                )
+        
+        self.assertEqual(self.poll_url(sched), ('http://a/1', None))
+        self.assertEqual(self.poll_url(sched), ('http://b/1', None))
+        
+        # the next token of ``http://a/`` is in ``1 / rate`` seconds,
+        #   finished requests do not give tokens
+        sched.release('http://a/1')
+        
+        self.assertEqual(self.poll_url(sched), (None, 0.5))
+        
+        self.clock.now += 0.25
+        
+        self.assertEqual(self.poll_url(sched), (None, 0.25))
+        
+        self.clock.now += 0.25
+        
+        self.assertEqual(self.poll_url(sched), ('http://a/2', None))
+    
+    def test_burst(self):
+        sched = host_sched.HostScheduler(
+                get_url_iter(['http://a/{}'.format(i) for i in range(4)]),
+                default_limit=host_sched.HostLimit(rate=1.0, burst=3.0),
+                )
+        
+        self.assertEqual(self.poll_url(sched), ('http://a/0', None))
+        
+        # idle time is accumulated up to ``burst`` tokens
+        self.clock.now += 10.0
+        
+        self.assertEqual(self.poll_url(sched), ('http://a/1', None))
+        self.assertEqual(self.poll_url(sched), ('http://a/2', None))
+        self.assertEqual(self.poll_url(sched), ('http://a/3', None))
+    
+    def test_retry_delay(self):
+        sched = host_sched.HostScheduler(get_url_iter(('http://a/1',)))
+        item, delay = sched.poll()
+        sched.retry(item, 2.0)
+        sched.release(item[1])
+        
+        self.assertEqual(sched.poll(), (None, 2.0))
+        
+        self.clock.now += 2.0
+        
+        self.assertEqual(sched.poll(), ((0, 'http://a/1', 2), None))
@@ -0,0 +1,75 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import zlib, gzip, unittest
+from .. import http_client
+
+BODY = b'<html>news</html>\n' * 1000
+
+def decode(encoding, content, limit=None, piece_size=None):
+    if limit is None:
+        limit = len(BODY) * 2
+    
+    if piece_size is None:
+        piece_size = len(content)
+    
+    decoder = http_client.ContentDecoder(encoding, limit)
+    chunk_list = [
+            decoder.feed(content[pos:pos + piece_size])
+            for pos in range(0, len(content), piece_size)
+            ]
+    chunk_list.append(decoder.flush())
+    
+    return b''.join(chunk_list)
+
+class ContentDecoderTest(unittest.TestCase):
+    def test_identity(self):
+        self.assertEqual(decode(None, BODY), BODY)
+        self.assertEqual(decode('identity', BODY, limit=100), BODY[:100])
+    
+    def test_gzip_size_cap(self):
+        bomb = gzip.compress(b'\0' * 10000000)
+        
+        self.assertEqual(decode('gzip', bomb, limit=1000), b'\0' * 1000)
+        self.assertEqual(
+                decode('gzip', gzip.compress(BODY), piece_size=7), BODY)
+    
+    def test_deflate_split_header(self):
+        zlib_content = zlib.compress(BODY)
+        raw_content = zlib_content[2:-4]
+        
+        for piece_size in (1, 2, 3, len(zlib_content)):
+            self.assertEqual(
+                    decode('deflate', zlib_content, piece_size=piece_size),
+                    BODY)
+            self.assertEqual(
+                    decode('deflate', raw_content, piece_size=piece_size),
+                    BODY)
+    
+    def test_deflate_size_cap(self):
+        self.assertEqual(
+                decode('deflate', zlib.compress(BODY), limit=100, piece_size=1),
+                BODY[:100])
+    
+    def test_unsupported_encoding(self):
+        with self.assertRaises(http_client.HttpClientError):
+            http_client.ContentDecoder('compress', 100)
+
+if __name__ == '__main__':
+    unittest.main()
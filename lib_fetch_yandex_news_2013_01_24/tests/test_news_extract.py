@@ -0,0 +1,134 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import unittest
+from .. import fetch_news, news_item
+from ..bench import bench_parse
+
+PAGE_URL = 'http://news.yandex.ru/index.html'
+
+YANDEX_NEWS_CONTENT = '''\
+<html><body>
+<!-- <dl class="b-news-item"><a class="title" href="/c">Comment</a></dl> -->
+<script>var s = '<dl class="b-news-item">';</script>
+<dl class="b-news-item first">
+    <dt><a class="title extra" href="/news/1">Tom &amp; Jerry</a></dt>
+    <dd class="text">Text &lt;1&gt;</dd>
+</dl>
+<dl class="b-news-item"><dt><a class="title">No href</a></dt></dl>
+<dl class="b-news-item">
+    <dt><a class="title" href="/news/3"><b>Bold</b> title</a></dt>
+    <dd class="text">Skipped</dd>
+</dl>
+<dl class="b-news-item">
+    <dt><a class="title" href="http://example.com/4?a=1&amp;b=2">Multi
+line</a></dt>
+    <dd class="text"><i>Text</i> is not the first child</dd>
+</dl>
+<dl class="b-news-item"><dt><a class="title" href="/news/5">Unclosed</a>
+'''
+
+GOOGLE_NEWS_CONTENT = '''\
+<html><body>
+<a class="article" href="/news/url?url=http://example.com/1&amp;sa=t">
+    <span class="titletext">First</span>
+</a>
+<a class="article extra" href="http://example.com/2">
+    <span class="titletext">Second &quot;quoted&quot;</span>
+    <span class="titletext">Ignored</span>
+</a>
+<a class="article" href="/3"><span class="other">No title</span></a>
+</body></html>
+'''
+
+def item_dict_list(result):
+    return [news_item.to_dict(item) for item in result]
+
+class NewsExtractTest(unittest.TestCase):
+    def test_yandex_news(self):
+        result = fetch_news.parse_yandex_news_content(
+                PAGE_URL, YANDEX_NEWS_CONTENT.encode())
+        
+        self.assertEqual(item_dict_list(result), [
+                {
+                    'title': 'Tom & Jerry',
+                    'raw_url': 'http://news.yandex.ru/news/1',
+                    'url': 'http://news.yandex.ru/news/1',
+                    'text': 'Text <1>',
+                },
+                {
+                    'title': 'No href',
+                    'raw_url': PAGE_URL,
+                    'url': PAGE_URL,
+                },
+                {
+                    'title': 'Multi\nline',
+                    'raw_url': 'http://example.com/4?a=1&b=2',
+                    'url': 'http://example.com/4?a=1&b=2',
+                },
+                {
+                    'title': 'Unclosed',
+                    'raw_url': 'http://news.yandex.ru/news/5',
+                    'url': 'http://news.yandex.ru/news/5',
+                },
+                ])
+    
+    def test_google_news(self):
+        url = 'http://news.google.com/'
+        result = fetch_news.parse_google_news_content(
+                url, GOOGLE_NEWS_CONTENT.encode())
+        
+        self.assertEqual(item_dict_list(result), [
+                {
+                    'title': 'First',
+                    'raw_url':
+                            'http://news.google.com/news/url'
+                            '?url=http://example.com/1&sa=t',
+                    'url': 'http://example.com/1',
+                },
+                {
+                    'title': 'Second "quoted"',
+                    'raw_url': 'http://example.com/2',
+                    'url': 'http://example.com/2',
+                },
+                ])
+
+# the tree parsers of ``bench_parse`` are the parsing which was used
+#   before ``news_extract``
+@unittest.skipIf(bench_parse.html_parse is None, 'html_parse is not available')
+class OldParserTest(unittest.TestCase):
+    def check(self, parse_content, tree_find, url, content):
+        root = bench_parse.html_parse.html_parse(
+                content, use_min_attr_hack=True)
+        
+        self.assertEqual(
+                item_dict_list(parse_content(url, content.encode())),
+                list(tree_find(url, root)))
+    
+    def test_yandex_news(self):
+        self.check(
+                fetch_news.parse_yandex_news_content,
+                bench_parse.tree_find_yandex_news,
+                PAGE_URL, YANDEX_NEWS_CONTENT)
+    
+    def test_google_news(self):
+        self.check(
+                fetch_news.parse_google_news_content,
+                bench_parse.tree_find_google_news,
+                'http://news.google.com/', GOOGLE_NEWS_CONTENT)
@@ -0,0 +1,58 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import io, errno, threading, unittest
+from .. import fetch_news, news_item, output_writers
+
+class FullFile(io.StringIO):
+    def flush(self):
+        raise OSError(errno.ENOSPC, 'No space left on device')
+
+def make_data(url_id):
+    data = fetch_news.Data()
+    data.url_id = url_id
+    data.url = 'http://news.yandex.ru/{}'.format(url_id)
+    data.result = (news_item.NewsItem(title='News', url='http://a/'),)
+    
+    return data
+
+class OutputWriterTest(unittest.TestCase):
+    def test_write_error_stops_writer(self):
+        writer = output_writers.OutputWriter(
+                FullFile(), output_writers.JsonlFormatter(),
+                flush_interval=0.0)
+        
+        # the error of writing thread is printed by ``threading``
+        excepthook = threading.excepthook
+        threading.excepthook = lambda args: None
+        
+        try:
+            writer.write(make_data(0))
+            writer._thread.join(5.0)
+        finally:
+            threading.excepthook = excepthook
+        
+        with self.assertRaises(OSError):
+            writer.write(make_data(1))
+        
+        with self.assertRaises(OSError):
+            writer.close()
+
+if __name__ == '__main__':
+    unittest.main()
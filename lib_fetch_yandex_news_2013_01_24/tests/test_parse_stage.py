@@ -0,0 +1,60 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import threading, unittest
+from .. import fetch_news, http_client, parse_stage
+
+def parse_content(url, content):
+    return ({'title': content.decode(), 'url': url},)
+
+class FailingCache:
+    def put(self, url, headers, result):
+        raise OSError('no space left on device')
+
+class ParseStageTest(unittest.TestCase):
+    def parse(self, stage):
+        resp = http_client.HttpResponse(200, {}, b'News')
+        data = fetch_news.Data()
+        data.url = 'http://a/'
+        data.timings = {}
+        delivered = []
+        
+        def on_result(data):
+            delivered.append(threading.current_thread())
+        
+        try:
+            stage.parse(data, resp, parse_content, on_result=on_result)
+        finally:
+            stage.close()
+        
+        self.assertEqual(len(delivered), 1)
+        self.assertIsNone(data.error)
+        self.assertEqual(data.result[0].title, 'News')
+        
+        return delivered[0]
+    
+    def test_cache_error_inline(self):
+        self.parse(parse_stage.ParseStage(cache=FailingCache()))
+    
+    def test_cache_error_procs(self):
+        stage = parse_stage.ParseStage(procs=1, cache=FailingCache())
+        
+        # the result is delivered by own thread of the stage, not by
+        #   the thread of the process pool
+        self.assertIs(self.parse(stage), stage._delivery_thread)
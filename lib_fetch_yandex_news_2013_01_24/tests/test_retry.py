@@ -0,0 +1,90 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import socket, asyncio, unittest
+from http import client as http_client
+from unittest import mock
+from .. import retry
+
+class StatusError(Exception):
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+class ClassifyErrorTest(unittest.TestCase):
+    def test_status(self):
+        for status in (408, 429, 500, 502, 503):
+            self.assertEqual(
+                    retry.classify_error(StatusError(status)),
+                    retry.ERROR_TRANSIENT)
+        
+        for status in (301, 302, 403, 404):
+            self.assertEqual(
+                    retry.classify_error(StatusError(status)),
+                    retry.ERROR_PERMANENT)
+    
+    def test_error_type(self):
+        for error in (
+                socket.timeout('timed out'),
+                socket.gaierror(-3, 'temporary failure'),
+                ConnectionResetError(),
+                ConnectionRefusedError(),
+                EOFError(),
+                asyncio.TimeoutError(),
+                http_client.RemoteDisconnected('closed'),
+                http_client.IncompleteRead(b''),
+                ):
+            self.assertEqual(
+                    retry.classify_error(error), retry.ERROR_TRANSIENT, error)
+        
+        for error in (ValueError('bad url'), PermissionError(), KeyError()):
+            self.assertEqual(
+                    retry.classify_error(error), retry.ERROR_PERMANENT, error)
+
+class RetryPolicyTest(unittest.TestCase):
+    def test_should_retry(self):
+        policy = retry.RetryPolicy(max_attempts=3)
+        
+        self.assertTrue(policy.should_retry(retry.ERROR_TRANSIENT, 1))
+        self.assertTrue(policy.should_retry(retry.ERROR_TRANSIENT, 2))
+        self.assertFalse(policy.should_retry(retry.ERROR_TRANSIENT, 3))
+        self.assertFalse(policy.should_retry(retry.ERROR_PERMANENT, 1))
+        self.assertFalse(policy.should_retry(retry.ERROR_PARSE, 1))
+    
+    def test_delay_bounds(self):
+        policy = retry.RetryPolicy(base_delay=0.5, max_delay=10.0)
+        
+        # full jitter: the delay is taken from ``[0, bound]``
+        with mock.patch.object(
+                retry.random, 'uniform', lambda a, b: (a, b)):
+            self.assertEqual(policy.get_delay(1), (0.0, 0.5))
+            self.assertEqual(policy.get_delay(2), (0.0, 1.0))
+            self.assertEqual(policy.get_delay(5), (0.0, 8.0))
+            self.assertEqual(policy.get_delay(6), (0.0, 10.0))
+            self.assertEqual(policy.get_delay(5000), (0.0, 10.0))
+    
+    def test_delay_range(self):
+        policy = retry.RetryPolicy(base_delay=1.0, max_delay=4.0)
+        
+        for attempt in range(1, 10):
+            for i in range(20):
+                delay = policy.get_delay(attempt)
+                
+                self.assertGreaterEqual(delay, 0.0)
+                self.assertLessEqual(delay, min(4.0, 2.0 ** (attempt - 1)))
@@ -0,0 +1,69 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import os, stat, tempfile, shutil, unittest
+from unittest import mock
+from .. import news_item, seen_store
+
+class SeenStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.dir_path = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir_path, 'out.seen')
+    
+    def tearDown(self):
+        shutil.rmtree(self.dir_path)
+    
+    def test_save_and_load(self):
+        item = news_item.NewsItem(title='News', url='http://a/')
+        seen = seen_store.SeenStore(self.path)
+        
+        self.assertEqual(seen.filter((item,)), (item,))
+        
+        seen.save()
+        
+        self.assertEqual(seen_store.SeenStore(self.path).filter((item,)), ())
+    
+    def test_save_keeps_file_mode(self):
+        seen_store.SeenStore(self.path).save()
+        
+        self.assertEqual(
+                stat.S_IMODE(os.stat(self.path).st_mode),
+                seen_store.DEFAULT_FILE_MODE)
+        
+        os.chmod(self.path, 0o640)
+        seen_store.SeenStore(self.path).save()
+        
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o640)
+    
+    def test_interrupt_after_replace(self):
+        os_replace = os.replace
+        
+        def replace(src, dst):
+            os_replace(src, dst)
+            
+            raise KeyboardInterrupt
+        
+        with mock.patch.object(seen_store.os, 'replace', replace):
+            with self.assertRaises(KeyboardInterrupt):
+                seen_store.SeenStore(self.path).save()
+        
+        self.assertTrue(os.path.exists(self.path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import os, sqlite3, tempfile, shutil, unittest
+from .. import fetch_news, news_item, sqlite_store
+
+class SqliteStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.dir_path = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.dir_path, 'news.db')
+    
+    def tearDown(self):
+        shutil.rmtree(self.dir_path)
+    
+    def test_query_of_missing_db_fails(self):
+        with self.assertRaises(sqlite3.Error):
+            sqlite_store.query_news(self.db_path)
+        
+        self.assertFalse(os.path.exists(self.db_path))
+    
+    def test_write_and_query(self):
+        data = fetch_news.Data()
+        data.url = 'http://news.yandex.ru/'
+        data.result = (
+                news_item.NewsItem(title='News', url='http://www.a.ru/1'),)
+        
+        store = sqlite_store.SqliteStore(self.db_path)
+        store.write(data)
+        store.write(data)
+        store.close()
+        
+        row_list = list(sqlite_store.query_news(self.db_path, domain='a.ru'))
+        
+        self.assertEqual(len(row_list), 1)
+        self.assertEqual(row_list[0]['title'], 'News')
+
+if __name__ == '__main__':
+    unittest.main()
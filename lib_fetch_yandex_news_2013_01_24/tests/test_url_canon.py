@@ -0,0 +1,54 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import unittest
+from .. import url_canon
+
+class FixGoogleNewsUrlTest(unittest.TestCase):
+    def test_google_redirect_is_unwrapped(self):
+        self.assertEqual(
+                url_canon.fix_google_news_url(
+                        'https://news.google.com/news/url'
+                        '?url=http://example.com/a&usg=1'),
+                'http://example.com/a')
+        self.assertEqual(
+                url_canon.fix_google_news_url(
+                        'https://www.google.ru/url?url=http://example.com/b'),
+                'http://example.com/b')
+    
+    def test_other_redirect_is_kept(self):
+        for url in (
+                'http://example.com/url?url=http://example.org/',
+                'https://news.google.com/a/url?url=http://example.org/',
+                'http://google.example.com/url?url=http://example.org/',
+                ):
+            self.assertEqual(url_canon.fix_google_news_url(url), url)
+    
+    def test_google_params_are_stripped_on_google_only(self):
+        self.assertEqual(
+                url_canon.strip_tracking_params(
+                        'https://news.google.com/x?hl=ru&ved=1&oc=5'),
+                'https://news.google.com/x?hl=ru')
+        self.assertEqual(
+                url_canon.strip_tracking_params(
+                        'http://example.com/a?ei=5&id=3&utm_source=x'),
+                'http://example.com/a?ei=5&id=3')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import os, gzip, json, tempfile, unittest
+from .. import url_source
+
+class UrlSourceTest(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.gz')
+        os.close(fd)
+    
+    def tearDown(self):
+        os.unlink(self.path)
+    
+    def test_bad_priority_is_invalid(self):
+        with gzip.open(self.path, 'wt', encoding='utf-8') as fd:
+            fd.write('http://news.yandex.ru/1\n')
+            fd.write(json.dumps(
+                    {'url': 'http://news.yandex.ru/2', 'priority': [1]}))
+            fd.write('\nhttp://news.yandex.ru/3\n')
+        
+        source = url_source.UrlSource((self.path,))
+        
+        self.assertEqual(
+                list(source),
+                ['http://news.yandex.ru/1', 'http://news.yandex.ru/3'])
+        self.assertEqual(source.invalid_count, 1)
+        self.assertIsNone(source.read_error)
+    
+    def test_corrupt_gzip_is_read_error(self):
+        with open(self.path, 'wb') as fd:
+            fd.write(gzip.compress(b'http://news.yandex.ru/1\n' * 1000)[:-100])
+        
+        error_list = []
+        source = url_source.UrlSource(
+                (self.path,),
+                on_error=lambda path, error: error_list.append(path),
+                )
+        list(source)
+        
+        self.assertIsNotNone(source.read_error)
+        self.assertEqual(error_list, [self.path])
+
+if __name__ == '__main__':
+    unittest.main()
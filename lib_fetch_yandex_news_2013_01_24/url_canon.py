@@ -0,0 +1,180 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import re, functools
+from urllib import parse as url_parse
+
+CACHE_SIZE = 10000 # urls
+
+# the same rule as ``urllib.parse.urlsplit()`` uses to find scheme
+SCHEME_RE = re.compile(r'^[A-Za-z][A-Za-z0-9+\-.]*:')
+
+CL4URL_PARAM = 'cl4url='
+
+# redirect parameter of old ``news.google.com/news/url`` links
+GOOGLE_URL_PARAM = 'url='
+GOOGLE_REDIRECT_PATH_SET = frozenset(('/url', '/news/url'))
+
+# well-known tracking parameters, stripped on every host
+TRACKING_PARAM_PREFIX_LIST = ('utm_',)
+TRACKING_PARAM_SET = frozenset(('gclid', 'fbclid'))
+
+# parameters of Google's own links. on other hosts these names may be
+#   real parameters of the page, so they are stripped on Google only
+GOOGLE_TRACKING_PARAM_SET = frozenset(('ved', 'usg', 'ei', 'oc', 'ocid'))
+GOOGLE_HOST_RE = re.compile(r'^(?:.+\.)?google(?:\.[a-z]{2,3}){1,2}$')
+
+# value of the first non-empty query parameter ``param`` (given with
+#   ``=``), like ``url_parse.parse_qs(query).get(name, [''])[0]``, but
+#   without splitting of the whole query
+def find_query_param(url, param):
+    query_end = url.find('#')
+    
+    if query_end == -1:
+        query_end = len(url)
+    
+    query_pos = url.find('?', 0, query_end)
+    
+    if query_pos == -1:
+        return ''
+    
+    pos = url.find(param, query_pos)
+    
+    while pos != -1 and pos < query_end:
+        if url[pos - 1] in '?&':
+            value_pos = pos + len(param)
+            value_end = url.find('&', value_pos, query_end)
+            
+            if value_end == -1:
+                value_end = query_end
+            
+            if value_end > value_pos:
+                return url_parse.unquote_plus(url[value_pos:value_end])
+        
+        pos = url.find(param, pos + 1)
+    
+    return ''
+
+def add_scheme(url):
+    if SCHEME_RE.match(url) is None:
+        return 'http://{}'.format(url)
+    
+    return url
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def join_url(base_url, url):
+    return url_parse.urljoin(base_url, url)
+
+# real url of news from Yandex.News redirect link (``cl4url`` parameter)
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def fix_yandex_news_url(raw_url):
+    cl4url_param = find_query_param(raw_url, CL4URL_PARAM)
+    
+    if not cl4url_param:
+        return str(raw_url)
+    
+    return add_scheme(cl4url_param)
+
+def is_tracking_param(name, host_param_set=None):
+    return name in TRACKING_PARAM_SET or \
+            name.startswith(TRACKING_PARAM_PREFIX_LIST) or \
+            (host_param_set is not None and name in host_param_set)
+
+def is_google_host(host):
+    return host is not None and GOOGLE_HOST_RE.match(host) is not None
+
+def strip_tracking_params(url):
+    if '?' not in url:
+        return url
+    
+    url_obj = url_parse.urlsplit(url)
+    
+    if is_google_host(url_obj.hostname):
+        host_param_set = GOOGLE_TRACKING_PARAM_SET
+    else:
+        host_param_set = None
+    
+    param_list = url_obj.query.split('&')
+    kept_param_list = [
+            param for param in param_list
+            if not is_tracking_param(
+                    param.partition('=')[0], host_param_set=host_param_set)
+            ]
+    
+    if len(kept_param_list) == len(param_list):
+        return url
+    
+    return url_parse.urlunsplit(url_obj._replace(
+            query='&'.join(kept_param_list)))
+
+# only Google's own redirect links are unwrapped: ``url`` parameter of
+#   other site is not the url of the news
+def is_google_redirect_url(url):
+    url_obj = url_parse.urlsplit(url)
+    
+    return url_obj.path in GOOGLE_REDIRECT_PATH_SET and \
+            is_google_host(url_obj.hostname)
+
+# real url of news from Google.News link, without tracking parameters
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def fix_google_news_url(raw_url):
+    url = raw_url
+    
+    if '/url?' in url and is_google_redirect_url(url):
+        redirect_url = find_query_param(url, GOOGLE_URL_PARAM)
+        
+        if redirect_url:
+            url = add_scheme(redirect_url)
+    
+    return strip_tracking_params(url)
+
+DEFAULT_PORT_MAP = {'http': 80, 'https': 443}
+
+# canonical form of url to fetch: lower-case scheme and host, no default
+#   port, no fragment. raises ``ValueError`` for url which can not be
+#   fetched
+def canonicalize_url(url):
+    url_obj = url_parse.urlsplit(url.strip())
+    scheme = url_obj.scheme.lower()
+    
+    if scheme not in DEFAULT_PORT_MAP:
+        raise ValueError('unsupported url scheme: {!r}'.format(url))
+    
+    host = url_obj.hostname
+    
+    if not host:
+        raise ValueError('url has no host: {!r}'.format(url))
+    
+    port = url_obj.port
+    
+    if ':' in host:
+        netloc = '[{}]'.format(host)
+    else:
+        netloc = host
+    
+    if port is not None and port != DEFAULT_PORT_MAP[scheme]:
+        netloc = '{}:{}'.format(netloc, port)
+    
+    userinfo, sep, hostport = url_obj.netloc.rpartition('@')
+    
+    if sep:
+        netloc = '{}@{}'.format(userinfo, netloc)
+    
+    return url_parse.urlunsplit(
+            (scheme, netloc, url_obj.path or '/', url_obj.query, ''))
@@ -0,0 +1,209 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2013 Andrej A Antonov <polymorphm@gmail.com>.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+assert str is not bytes
+
+import sys, heapq, itertools, zlib
+# ``fetch_news`` also registers built-in services, urls are checked
+#   against them
+from . import fetch_news, url_canon
+
+DEFAULT_DEDUP_MAX_SIZE = 1000000 # urls
+DEFAULT_PRIORITY_WINDOW = 1000 # urls
+
+STDIN_PATH = '-'
+
+# errors of reading url list file. gzip raises ``EOFError`` for
+#   truncated file and ``zlib.error`` for corrupt one
+READ_ERROR_TYPES = (EnvironmentError, EOFError, zlib.error)
+
+# url with metadata from url list. it is ``str``, so it goes through
+#   fetching like plain url. ``priority`` -- bigger is fetched earlier,
+#   ``service`` -- name of service to use instead of found by url
+class SourceUrl(str):
+    priority = 0
+    service = None
+
+def open_source(path):
+    if path == STDIN_PATH:
+        return open(sys.stdin.fileno(), 'r',
+                encoding='utf-8', errors='replace', closefd=False)
+    
+    if path.endswith('.gz'):
+        import gzip
+        
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+# line is url, or JSON object like
+#   ``{"url": "...", "priority": 1, "service": "yandex-news"}``.
+#   returns ``None`` for empty lines and ``#`` comments
+def parse_line(line):
+    line = line.strip()
+    
+    if not line or line.startswith('#'):
+        return None
+    
+    if not line.startswith('{'):
+        return SourceUrl(line)
+    
+    import json
+    
+    url_obj = json.loads(line)
+    
+    if not isinstance(url_obj, dict) or \
+            not isinstance(url_obj.get('url'), str):
+        raise ValueError('no url in line: {!r}'.format(line))
+    
+    url = SourceUrl(url_obj['url'])
+    
+    try:
+        if url_obj.get('priority') is not None:
+            url.priority = int(url_obj['priority'])
+    except (TypeError, ValueError):
+        raise ValueError('bad priority in line: {!r}'.format(line))
+    
+    if url_obj.get('service') is not None:
+        url.service = str(url_obj['service'])
+    
+    return url
+
+# set of seen urls which keeps at most ``max_size`` hashes of them.
+#   when it is full, urls seen long ago are forgotten
+class BoundedUrlSet:
+    def __init__(self, max_size=None):
+        if max_size is None:
+            max_size = DEFAULT_DEDUP_MAX_SIZE
+        
+        self._generation_size = max(1, max_size // 2)
+        self._current_set = set()
+        self._previous_set = set()
+    
+    # returns ``True`` if url was not seen before
+    def add(self, url):
+        url_hash = hash(url)
+        
+        if url_hash in self._current_set:
+            return False
+        
+        if url_hash in self._previous_set:
+            self._current_set.add(url_hash)
+            
+            return False
+        
+        if len(self._current_set) >= self._generation_size:
+            self._previous_set = self._current_set
+            self._current_set = set()
+        
+        self._current_set.add(url_hash)
+        
+        return True
+
+# streams urls from url list files: validated, canonical, without
+#   duplicates. urls of higher priority go first inside window of
+#   ``priority_window`` urls, so memory does not depend on list size.
+#   ``on_skip(line, reason)`` is called for every skipped url.
+#   read error stops reading of its file and is kept in ``read_error``
+#   and passed to ``on_error(path, error)``: the list must not silently
+#   look shorter than it is
+class UrlSource:
+    def __init__(self, path_list, dedup_max_size=None,
+            priority_window=None, on_skip=None, on_error=None):
+        if priority_window is None:
+            priority_window = DEFAULT_PRIORITY_WINDOW
+        
+        self._path_list = tuple(path_list)
+        self._url_set = BoundedUrlSet(max_size=dedup_max_size)
+        self._priority_window = priority_window
+        self._on_skip = on_skip
+        self._on_error = on_error
+        self.invalid_count = 0
+        self.dup_count = 0
+        self.read_error = None
+    
+    def _skip(self, line, reason):
+        if self._on_skip is not None:
+            self._on_skip(line, reason)
+    
+    def _iter_lines(self, path):
+        try:
+            with open_source(path) as fd:
+                yield from fd
+        except READ_ERROR_TYPES as e:
+            self.read_error = e
+            
+            if self._on_error is not None:
+                self._on_error(path, e)
+    
+    def _check_url(self, line):
+        url = parse_line(line)
+        
+        if url is None:
+            return None
+        
+        canonical_url = SourceUrl(url_canon.canonicalize_url(url))
+        canonical_url.__dict__.update(url.__dict__)
+        
+        # the same lookup as fetching does, so url which passes the check
+        #   is not failed as of unknown service later
+        try:
+            fetch_news.find_service(canonical_url)
+        except fetch_news.UnknownServiceFetchNewsError:
+            if canonical_url.service is not None:
+                raise ValueError(
+                        'unknown service: {!r}'.format(canonical_url.service))
+            
+            raise ValueError('unknown service')
+        
+        return canonical_url
+    
+    def iter_checked(self):
+        for path in self._path_list:
+            for line in self._iter_lines(path):
+                try:
+                    url = self._check_url(line)
+                except ValueError as e:
+                    self.invalid_count += 1
+                    self._skip(line.strip(), str(e))
+                    continue
+                
+                if url is None:
+                    continue
+                
+                if not self._url_set.add(url):
+                    self.dup_count += 1
+                    self._skip(url, 'duplicate')
+                    continue
+                
+                yield url
+    
+    def __iter__(self):
+        heap = []
+        counter = itertools.count()
+        
+        for url in self.iter_checked():
+            heapq.heappush(heap, (-url.priority, next(counter), url))
+            
+            if len(heap) > self._priority_window:
+                yield heapq.heappop(heap)[2]
+        
+        while heap:
+            yield heapq.heappop(heap)[2]
+
+def iter_urls(path, **kwargs):
+    return iter(UrlSource((path,), **kwargs))
@@ -19,10 +19,18 @@
 assert str is not bytes
 
 
+import sys
+
 # pre-import for cx_Freeze
 import re
 
 from lib_fetch_yandex_news_2013_01_24.gui.main_gui import main
 
 if __name__ == '__main__':
+    if getattr(sys, 'frozen', False):
+        # parsing processes are started from frozen executable too
+        import multiprocessing
+        
+        multiprocessing.freeze_support()
+    
     main()